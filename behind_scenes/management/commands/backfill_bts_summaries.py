@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from behind_scenes.models import BTSPage
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored teaser summary (summary_text) of every BTS page."
+
+    def handle(self, *args, **options):
+        changed = []
+        pages = BTSPage.objects.only("teaser_summary", "intro_body", "summary_text")
+        for page in pages.iterator():
+            summary_text = page.build_summary_text()
+            if page.summary_text != summary_text:
+                page.summary_text = summary_text
+                changed.append(page)
+
+        BTSPage.objects.bulk_update(changed, ["summary_text"], batch_size=500)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the summary of {len(changed)} BTS pages.")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('behind_scenes', '0007_alter_btspage_body'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='btspage',
+            name='summary_text',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=201),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('behind_scenes', '0008_btspage_summary_text'),
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='btspage',
+            index=models.Index(fields=['category', 'page_ptr'], name='btspage_category_idx'),
+        ),
+    ]
@@ -1,14 +1,23 @@
 # behind_scenes/models.py
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+
 from django.db import models
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.utils.html import strip_tags
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.embeds.blocks import EmbedBlock
 from wagtail.fields import RichTextField, StreamField
-from wagtail.images.blocks import ImageChooserBlock
-from wagtail.models import Page
+from wagtail.models import Page, PageManager
+from wagtail.query import PageQuerySet
+from wagtail.search import index
+
+from core.blocks import ImageChooserBlock
+from core.dependencies import record
 
 # Categories used for grouping teasers
 BTS_CATEGORIES = (
@@ -18,6 +27,57 @@ BTS_CATEGORIES = (
     ("communication", "Communication"),
 )
 
+# Plain-text teaser summaries are cut after this many characters
+SUMMARY_LENGTH = 200
+
+# What a teaser card renders: everything else (intro_body, body) stays in
+# the database when listing teasers
+TEASER_FIELDS = (
+    "title",
+    "url_path",
+    "first_published_at",
+    "category",
+    "teaser_title",
+    "summary_text",
+    "teaser_image",
+)
+
+
+class BTSPageQuerySet(PageQuerySet):
+    def teasers(self):
+        """
+        Just what teaser cards render: TEASER_FIELDS (no rich text or
+        StreamField JSON), the teaser image joined in and its renditions
+        prefetched, so a list of cards costs two queries however long it is.
+        """
+        return (
+            self.only(*TEASER_FIELDS)
+            .select_related("teaser_image")
+            .prefetch_related("teaser_image__renditions")
+        )
+
+
+BTSPageManager = PageManager.from_queryset(BTSPageQuerySet)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def teaser_cursor(page) -> str:
+    """Keyset position of a teaser: its publish time (in µs) and id."""
+    microseconds = (page.first_published_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds}_{page.pk}"
+
+
+def parse_teaser_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of teaser_cursor(); ValueError if it isn't one."""
+    microseconds, pk = cursor.split("_")
+    try:
+        return _EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+    except OverflowError as e:
+        # Out of datetime's range
+        raise ValueError(f"Invalid teaser cursor: {cursor!r}") from e
+
 
 class BTSIndexPage(Page):
     """Landing page that shows intro + ALL teaser cards in one responsive grid."""
@@ -36,6 +96,12 @@ class BTSIndexPage(Page):
         FieldPanel("intro_body"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("intro_heading", boost=2),
+        index.SearchField("intro_body"),
+    ]
+    search_auto_update = False
+
     parent_page_types = ["home.HomePage"]
     subpage_types = ["behind_scenes.BTSPage"]  # detail pages live under here
 
@@ -47,27 +113,62 @@ class BTSIndexPage(Page):
         return (
             BTSPage.objects.child_of(self)
             .live()
+            .teasers()
             .filter(category=category)
             .order_by("-first_published_at", "-latest_revision_created_at")
         )[:limit]
 
-    def get_context(self, request, *args, **kwargs):
+    # Cards in the first paint, and in each batch loaded after it
+    teasers_per_batch = 12
+
+    def teaser_batch(self, after: str | None = None):
         """
-        Provide a single combined queryset of all BTS items for the index page,
-        ordered newest first. The template renders them in one Bootstrap grid
-        (3 per row on lg, 2 on sm/md, 1 on xs).
+        One batch of child teasers, newest first, and the cursor of the next
+        batch (None after the last one). Keyset pagination on
+        (first_published_at, id): batch 20 costs what batch 1 does.
         """
-        ctx = super().get_context(request, *args, **kwargs)
-
-        all_items = (
+        teasers = (
             BTSPage.objects.child_of(self)
             .live()
-            .order_by("-first_published_at", "-latest_revision_created_at")
+            .teasers()
+            .order_by("-first_published_at", "-id")
         )
+        if after:
+            published_at, pk = parse_teaser_cursor(after)
+            teasers = teasers.filter(
+                Q(first_published_at__lt=published_at)
+                | Q(first_published_at=published_at, pk__lt=pk)
+            )
+
+        items = list(teasers[: self.teasers_per_batch + 1])
+        if len(items) <= self.teasers_per_batch:
+            return items, None
+        items = items[: self.teasers_per_batch]
+        return items, teaser_cursor(items[-1])
+
+    def teasers_url(self, cursor: str | None) -> str:
+        """Where the batch after ``cursor`` is served; "" after the last one."""
+        if cursor is None:
+            return ""
+        url = reverse("behind_scenes:teasers", args=[self.pk])
+        return f"{url}?{urlencode({'after': cursor})}"
+
+    def get_context(self, request, *args, **kwargs):
+        """
+        The first batch of BTS cards, newest first, in one Bootstrap grid
+        (3 per row on lg, 2 on sm/md, 1 on xs); the rest are fetched in
+        batches from the behind_scenes:teasers endpoint as the visitor scrolls.
+        """
+        ctx = super().get_context(request, *args, **kwargs)
+
+        # Any BTS page published joins the grid (BTSPage.get_purge_keys)
+        record("bts")
+        all_items, cursor = self.teaser_batch()
 
         ctx.update(
             {
                 "all_teasers": all_items,
+                "next_teasers_url": self.teasers_url(cursor),
                 # Optional; keep if other templates still use them
                 "written_teasers": self.teasers_for_category("written", 3),
                 "audio_teasers": self.teasers_for_category("audio", 3),
@@ -80,12 +181,18 @@ class BTSIndexPage(Page):
         )
         return ctx
 
+    def get_cache_dependencies(self):
+        """Teaser cards for every child are part of this page (core.conditional)."""
+        return BTSPage.objects.child_of(self)
+
 
 class BTSPage(Page):
     """One BTS detail page with its own URL."""
 
     template = "bts_detail_page.html"
 
+    objects = BTSPageManager()
+
     category = models.CharField(
         max_length=20,
         choices=BTS_CATEGORIES,
@@ -103,6 +210,10 @@ class BTSPage(Page):
         blank=True,
         help_text="1–2 lines for teaser cards.",
     )
+    # Denormalised card_summary, so teaser lists needn't load intro_body
+    summary_text = models.CharField(
+        max_length=SUMMARY_LENGTH + 1, blank=True, editable=False, db_index=True
+    )
     teaser_image = models.ForeignKey(
         "wagtailimages.Image",
         null=True,
@@ -207,15 +318,45 @@ class BTSPage(Page):
         FieldPanel("body"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("teaser_title", boost=3),
+        index.SearchField("intro_title", boost=2),
+        index.SearchField("teaser_summary", boost=2),
+        index.SearchField("intro_body"),
+        # StreamField: paragraphs, captions and gallery captions are extracted
+        index.SearchField("body"),
+        index.FilterField("category"),
+    ]
+    search_auto_update = False
+
     parent_page_types = ["behind_scenes.BTSIndexPage"]
     subpage_types = []
 
+    class Meta:
+        indexes = [
+            # Teasers of one category: the category's rows, joined to
+            # wagtailcore_page (whose first_published_at index orders them)
+            # without reading the table
+            models.Index(fields=["category", "page_ptr"], name="btspage_category_idx"),
+        ]
+
+    def get_purge_keys(self):
+        """
+        Edge-cache keys of the pages listing this one as a teaser: the BTS
+        index, and pages showing teasers of its category (see core.edge).
+        """
+        return ["bts", f"bts-{self.category}"]
+
     @property
     def card_title(self) -> str:
         return self.teaser_title or self.title
 
     @property
     def card_summary(self) -> str:
+        """Plain-text teaser summary, stored on save (see build_summary_text)."""
+        return self.summary_text
+
+    def build_summary_text(self) -> str:
         """
         Prefer explicit teaser_summary; otherwise fall back to plain-text intro_body.
         """
@@ -225,8 +366,18 @@ class BTSPage(Page):
         if self.intro_body:
             # Convert RichText to plain text, normalize whitespace, then truncate.
             text = " ".join(strip_tags(str(self.intro_body)).split())
-            if len(text) > 200:
-                return f"{text[:200]}…"
+            if len(text) > SUMMARY_LENGTH:
+                return f"{text[:SUMMARY_LENGTH]}…"
             return text
 
         return ""
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"teaser_summary", "intro_body"} & set(
+            update_fields
+        ):
+            self.summary_text = self.build_summary_text()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "summary_text"}
+        return super().save(*args, **kwargs)
@@ -1,8 +1,9 @@
 from django import template
-from wagtail.models import Site
 
 from behind_scenes.models import (  # adjust if your app label differs
     BTSIndexPage, BTSPage)
+from core.dependencies import record
+from core.sites import site_for_request
 
 register = template.Library()
 
@@ -14,16 +15,19 @@ def bts_teasers_for(context, category, limit=3):
       {% bts_teasers_for 'written' 3 as items %}
     """
     request = context.get("request")
-    qs = BTSPage.objects.live().public().filter(category=category).select_related("teaser_image")
+    # Purged with BTS pages of this category (BTSPage.get_purge_keys)
+    record(f"bts-{category}")
+    qs = BTSPage.objects.live().public().filter(category=category).teasers()
 
     # try to scope to the site's BTSIndexPage subtree
-    try:
-        site = Site.find_for_request(request) if request else Site.objects.get(is_default_site=True)
-        root_page = site.root_page
-        index = BTSIndexPage.objects.descendant_of(root_page, inclusive=True).live().first()
+    site = site_for_request(request)
+    if site:
+        index = (
+            BTSIndexPage.objects.live()
+            .filter(url_path__startswith=site.root_url_path)
+            .first()
+        )
         if index:
             qs = qs.descendant_of(index)
-    except Exception:
-        pass
 
     return qs.order_by("-first_published_at")[:limit]
@@ -1,3 +1,159 @@
-from django.test import TestCase
+import re
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+
+from core.testing import build_site, publish
+from journalism.models import get_bts_teasers
+
+from .models import BTSIndexPage, BTSPage
+
+
+class SummaryTextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def test_publish_stores_summary(self):
+        page = self.site.bts
+        page.intro_body = "<p>How   it <b>all</b>\n started</p>"
+        publish(page)
+        self.assertEqual(page.summary_text, "How it all started")
+
+        page.teaser_summary = "Explicit"
+        publish(page)
+        self.assertEqual(page.card_summary, "Explicit")
+
+    def test_draft_keeps_live_summary(self):
+        page = self.site.bts
+        page.teaser_summary = "Draft"
+        page.save_revision()
+        page.refresh_from_db()
+        self.assertEqual(page.summary_text, "")
+
+    def test_long_intro_is_truncated(self):
+        page = self.site.bts
+        page.intro_body = f"<p>{'word ' * 100}</p>"
+        publish(page)
+        self.assertEqual(len(page.summary_text), 201)
+        self.assertTrue(page.summary_text.endswith("…"))
+
+    def test_backfill(self):
+        BTSPage.objects.filter(pk=self.site.bts.pk).update(teaser_summary="Backfilled")
+        call_command("backfill_bts_summaries", stdout=StringIO())
+        self.site.bts.refresh_from_db()
+        self.assertEqual(self.site.bts.summary_text, "Backfilled")
+
+    def test_teasers_leave_bodies_unloaded(self):
+        (teaser,) = get_bts_teasers()
+        self.site.home.url  # caches the site root paths
+        self.assertTrue({"intro_body", "body"} <= teaser.get_deferred_fields())
+        with self.assertNumQueries(0):
+            teaser.card_title, teaser.card_summary, teaser.url
+
+
+class TeaserQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def add_teasers(self, count):
+        image = get_image_model().objects.create(
+            title="Teaser", file=get_test_image_file()
+        )
+        image.get_rendition("fill-600x338")
+        for n in range(count):
+            page = BTSPage(title=f"BTS {n}", slug=f"bts-{n}", teaser_image=image)
+            publish(self.site.bts_index.add_child(instance=page))
+
+    def test_cards_cost_two_queries(self):
+        self.add_teasers(5)
+        with self.assertNumQueries(2):
+            teasers = list(BTSPage.objects.live().teasers())
+            for teaser in teasers:
+                if teaser.teaser_image:
+                    teaser.teaser_image.get_rendition("fill-600x338")
+                teaser.card_title, teaser.card_summary
+        self.assertEqual(len(teasers), 6)
+
+    def test_bodies_are_not_loaded(self):
+        teaser = BTSPage.objects.teasers().get(pk=self.site.bts.pk)
+        self.assertTrue({"intro_body", "body"} <= teaser.get_deferred_fields())
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is Postgres'")
+class ListingIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def test_category_teasers_use_index(self):
+        with connection.cursor() as cursor:
+            # The test tables are tiny: make the planner show what it can use
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = (
+            BTSPage.objects.live()
+            .filter(category="written")
+            .teasers()
+            .order_by("-first_published_at")[:3]
+            .explain()
+        )
+        self.assertIn("btspage_category_idx", plan)
+
+
+class TeaserPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+        for n in range(4):
+            page = BTSPage(title=f"BTS {n}", slug=f"bts-{n}")
+            publish(cls.site.bts_index.add_child(instance=page))
+
+    def setUp(self):
+        self.enterContext(
+            mock.patch.object(BTSIndexPage, "teasers_per_batch", 2)
+        )
+
+    def titles(self, response):
+        return re.findall(
+            r'<h3 class="bts-title"><a [^>]*>([^<]*)</a>', response.content.decode()
+        )
+
+    def test_batches_walk_the_whole_index(self):
+        response = self.client.get(self.site.bts_index.url)
+        titles = self.titles(response)
+        self.assertEqual(titles, ["BTS 3", "BTS 2"])
+
+        next_url = response.context["next_teasers_url"]
+        while next_url:
+            batch = self.client.get(next_url)
+            self.assertEqual(batch.status_code, 200)
+            titles += self.titles(batch)
+            next_url = batch["X-Next-Page"]
+        self.assertEqual(titles, ["BTS 3", "BTS 2", "BTS 1", "BTS 0", "Making of"])
+
+    def test_batch_query_count_does_not_grow(self):
+        _, cursor = self.site.bts_index.teaser_batch()
+        with self.assertNumQueries(1):
+            self.site.bts_index.teaser_batch()
+        with self.assertNumQueries(1):
+            self.site.bts_index.teaser_batch(after=cursor)
+
+    def test_invalid_cursor(self):
+        url = self.site.bts_index.teasers_url("not-a-cursor")
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_out_of_range_cursor(self):
+        for cursor in ("99999999999999999999_1", "-99999999999999999999_1"):
+            url = self.site.bts_index.teasers_url(cursor)
+            self.assertEqual(self.client.get(url).status_code, 400)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "behind_scenes"
+
+urlpatterns = [
+    path("bts-teasers/<int:index_id>/", views.teasers, name="teasers"),
+]
@@ -1,3 +1,30 @@
-from django.shortcuts import render
+from __future__ import annotations
 
-# Create your views here.
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .models import BTSIndexPage
+
+
+@require_safe
+def teasers(request, index_id: int) -> HttpResponse:
+    """
+    The next batch of teaser cards of a BTS index page, as an HTML fragment
+    for its "load more" script. ``X-Next-Page`` is the URL of the batch
+    after it (empty after the last one).
+    """
+    index = get_object_or_404(BTSIndexPage.objects.live().public(), pk=index_id)
+    try:
+        items, cursor = index.teaser_batch(after=request.GET.get("after"))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    response = TemplateResponse(request, "_teaser_cards.html", {"items": items})
+    response["X-Next-Page"] = index.teasers_url(cursor)
+    # Not purged on publish (new cards join the first batch, served with the
+    # page), so only kept briefly
+    patch_cache_control(response, public=True, max_age=60)
+    return response
@@ -4,8 +4,10 @@ from __future__ import annotations
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import RichTextField, StreamField
-from wagtail.images.blocks import ImageChooserBlock
 from wagtail.models import Page
+from wagtail.search import index
+
+from core.blocks import ImageChooserBlock
 
 
 class ExampleItemBlock(blocks.StructBlock):
@@ -133,3 +135,16 @@ class CommunicationPage(Page):
         FieldPanel("services"),
         FieldPanel("instagram_reels"),
     ]
+
+    search_fields = Page.search_fields + [
+        index.SearchField("intro", boost=2),
+        index.SearchField("services"),
+        index.SearchField("project_highlights"),
+    ]
+    search_auto_update = False
+
+    def get_cache_dependencies(self):
+        """BTS teasers shown at the bottom of the page (see core.conditional)."""
+        from behind_scenes.models import BTSPage
+
+        return BTSPage.objects.all()
@@ -0,0 +1,89 @@
+# core/cache.py
+"""
+Stale-while-revalidate on top of Django's cache, with single-flight
+regeneration.
+
+Entries carry a soft expiry inside the stored value and live in the cache
+for a longer hard TTL. Past the soft expiry, one request (the one that wins
+a ``cache.add`` lock) recomputes the value while everyone else keeps getting
+the stale copy. Only a cold miss makes anyone wait, and even then only the
+lock holder hits the database: the rest poll briefly for its result.
+
+The lock is as shared as the cache backend: per worker with LocMemCache,
+site-wide with Redis (see CACHES in settings).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def cache_is_shared() -> bool:
+    """
+    Whether every worker uses the same default cache (SHARED_CACHE, on with
+    Redis). Entries dropped on publish (fragments, rich text, routes) are
+    only kept then: with per-process LocMem the invalidation would reach
+    just the worker that ran it, and the others would keep serving them.
+    """
+    return _setting("SHARED_CACHE", False)
+
+
+def get_or_set_stale(
+    key: str,
+    compute: Callable[[], Any],
+    soft_ttl: int,
+    hard_ttl: int | None = None,
+    cache_alias: str = "default",
+) -> Any:
+    """
+    Cached ``compute()`` under ``key``: fresh for ``soft_ttl`` seconds, then
+    served stale (while one caller refreshes it) until ``hard_ttl``.
+    ``hard_ttl`` defaults to ``soft_ttl + SWR_CACHE_STALE_TTL``.
+    """
+    cache = caches[cache_alias]
+    if hard_ttl is None:
+        hard_ttl = soft_ttl + _setting("SWR_CACHE_STALE_TTL", 60 * 60 * 24)
+    lock_key = f"{key}:lock"
+    lock_timeout = _setting("SWR_CACHE_LOCK_TIMEOUT", 30)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            # Someone else is already refreshing it
+            return value
+    elif not cache.add(lock_key, 1, lock_timeout):
+        # Cold miss while another request computes it: wait for that result
+        # rather than running the same queries in parallel.
+        value = _wait_for(cache, key)
+        if value is not _MISSING:
+            return value
+        return compute()
+
+    try:
+        value = compute()
+        cache.set(key, (value, time.time() + soft_ttl), hard_ttl)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def _wait_for(cache, key: str):
+    deadline = time.monotonic() + _setting("SWR_CACHE_LOCK_WAIT", 2.0)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return _MISSING
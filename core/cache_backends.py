@@ -0,0 +1,105 @@
+# core/cache_backends.py
+"""
+Django's cache backends, timed per request (core.timing) and counted by
+alias (core.metrics, the ``ALIAS`` cache setting).
+
+Every cache the project configures uses one of these, so the ``cache``
+Server-Timing entry and the hit ratios cover Wagtail's own lookups too.
+Outside a sampled request they cost a context variable lookup per call,
+plus a counter update per read.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from . import metrics
+from .timing import current, record, record_cache
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    # Set while a call is timed: backends implement some calls with others
+    # (get_many with get, ..), which mustn't be counted twice. Reads are
+    # always timed, for their hits and misses; record() drops the time
+    # outside a sampled request
+    _timing = False
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.alias = params.get("ALIAS", "")
+
+    @contextmanager
+    def _timed(self):
+        self._timing = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timing = False
+            record("cache", time.perf_counter() - start)
+
+    def _instrumented(self) -> bool:
+        return not self._timing and current() is not None
+
+    def _count(self, hits: int, misses: int) -> None:
+        record_cache(hits, misses)
+        metrics.inc("cache_requests_total", hits, cache=self.alias, result="hit")
+        metrics.inc("cache_requests_total", misses, cache=self.alias, result="miss")
+
+    def get(self, key, default=None, version=None):
+        if self._timing:
+            return super().get(key, default, version)
+        with self._timed():
+            value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        self._count(hits=int(hit), misses=int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        if self._timing:
+            return super().get_many(keys, version)
+        keys = list(keys)
+        with self._timed():
+            values = super().get_many(keys, version)
+        self._count(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+    def _write(self, method, *args, **kwargs):
+        if not self._instrumented():
+            return method(*args, **kwargs)
+        with self._timed():
+            return method(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._write(super().set, *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self._write(super().set_many, *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._write(super().add, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write(super().delete, *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._write(super().delete_many, *args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        return self._write(super().touch, *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self._write(super().incr, *args, **kwargs)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
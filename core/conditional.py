@@ -0,0 +1,134 @@
+# core/conditional.py
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import IntegerField, Max, Q
+from django.db.models.functions import Cast
+from django.utils import translation
+from wagtail.contrib.forms.models import FormMixin
+from wagtail.models import Page, PageLogEntry, ReferenceIndex
+
+from .dependencies import instance_keys_by_model, page_dependency_keys
+
+# Page-level log actions that change what other pages render without
+# touching any page's last_published_at.
+_STRUCTURAL_ACTIONS = ("wagtail.unpublish", "wagtail.delete", "wagtail.move")
+
+# Site root and section pages: base.html links to them on every page
+# (assumed dependencies of pages that have not been tracked yet)
+NAVIGATION_DEPTH = 3
+
+
+def supports_conditional_get(page, request) -> bool:
+    """
+    Only anonymous GET/HEAD requests for pages whose HTML is the same for
+    every visitor. Form pages render a CSRF token, and pending flash messages
+    are shown once, so both always get a fresh render.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if isinstance(page, FormMixin):
+        return False
+    if getattr(request, "user", None) is not None and request.user.is_authenticated:
+        # The userbar and preview links are per editor
+        return False
+    return not len(messages.get_messages(request))
+
+
+def dependency_filter(page, keys=None) -> Q:
+    """
+    Pages whose published state shows up in ``page``'s HTML: the page, its
+    translations (language switcher), the pages its last render used (see
+    core.dependencies), and whatever ``page.get_cache_dependencies()``
+    returns: listings like the BTS teasers on journalism pages, which a
+    newly published page can join.
+
+    Until a page has been rendered with tracking, navigation pages and the
+    pages it links to (Wagtail's reference index) stand in for its recorded
+    dependencies. ``keys`` are the recorded ones, if already loaded.
+    """
+    if keys is None:
+        keys = page_dependency_keys(page.pk)
+    recorded = [
+        int(key.removeprefix("page-")) for key in keys if key.startswith("page-")
+    ]
+    dependencies = Q(pk=page.pk) | Q(translation_key=page.translation_key)
+    if recorded:
+        dependencies |= Q(pk__in=recorded)
+    else:
+        references = ReferenceIndex.objects.filter(
+            base_content_type=ContentType.objects.get_for_model(Page),
+            object_id=str(page.pk),
+            to_content_type=ContentType.objects.get_for_model(Page),
+        ).values(pk=Cast("to_object_id", IntegerField()))
+        # Depth 1 is Wagtail's tree root, above every Site: never rendered
+        navigation = Q(depth__gt=1, depth__lte=NAVIGATION_DEPTH)
+        dependencies |= navigation | Q(pk__in=references)
+
+    get_cache_dependencies = getattr(page, "get_cache_dependencies", None)
+    if get_cache_dependencies is not None:
+        dependencies |= Q(pk__in=get_cache_dependencies().values("pk"))
+    return dependencies
+
+
+def _instance_state(keys) -> list:
+    """
+    The stored fields of the images, documents and snippets among ``keys``:
+    none of them has a modification time, and editing one doesn't touch the
+    pages that show it. One query per model.
+    """
+    state = []
+    grouped = instance_keys_by_model(keys)
+    for model in sorted(grouped, key=lambda model: model._meta.label_lower):
+        fields = [field.attname for field in model._meta.concrete_fields]
+        rows = (
+            model._default_manager.filter(pk__in=grouped[model])
+            .order_by("pk")
+            .values_list(*fields)
+        )
+        state.append((model._meta.label_lower, list(rows)))
+    return state
+
+
+def page_validators(page, keys=None) -> tuple[str, datetime | None]:
+    """
+    ``(etag, last_modified)`` for the current rendering of ``page``, from
+    the published state of its dependencies rather than the rendered HTML,
+    so they are known before ``get_context`` runs.
+
+    The ETag changes when a dependency is published, unpublished, moved,
+    renamed or deleted, when an image, document or snippet the last render
+    used is edited or deleted, or when a new release is deployed.
+    Last-Modified is the newest publish among the dependencies, or the
+    newest unpublish/move/delete anywhere on the site if that is later.
+
+    ``keys`` are the page's recorded dependencies, if already loaded.
+    """
+    if keys is None:
+        keys = page_dependency_keys(page.pk)
+    rows = list(
+        Page.objects.filter(dependency_filter(page, keys))
+        .order_by("pk")
+        .values_list("pk", "live", "url_path", "live_revision_id", "last_published_at")
+    )
+    state = (
+        page.pk,
+        getattr(settings, "RELEASE_VERSION", ""),
+        translation.get_language(),
+        [row[:4] + (row[4].isoformat() if row[4] else None,) for row in rows],
+        _instance_state(keys),
+    )
+    etag = '"%s"' % hashlib.sha1(repr(state).encode("utf-8")).hexdigest()
+
+    timestamps = [row[4] for row in rows if row[4]]
+    structural = PageLogEntry.objects.filter(action__in=_STRUCTURAL_ACTIONS).aggregate(
+        latest=Max("timestamp")
+    )["latest"]
+    if structural:
+        timestamps.append(structural)
+    return etag, max(timestamps, default=None)
@@ -0,0 +1,130 @@
+# core/db_routers.py
+"""
+Read-replica routing.
+
+Reads go to the primary unless the request being served was handed a
+replica (ReplicaReadsMiddleware: anonymous GET/HEAD page, search and
+sitemap reads). A write anywhere in such a request sends its remaining
+reads back to the primary, and the middleware pins the session to the
+primary for ``DB_REPLICA_LAG_SECONDS`` after it.
+
+Content changes (publish, move, edits to images, snippets, Sites, ..) pin
+every request to the primary for the same window: caches they invalidate
+must not be refilled from a replica that hasn't caught up yet. That pin is
+kept in the default cache, so replicas are only read when it is shared by
+every worker (SHARED_CACHE); with per-process LocMem only the worker that
+made the change would see it, and everything reads from the primary.
+
+A replica that fails to connect is skipped for ``DB_REPLICA_RETRY_SECONDS``.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .cache import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+_PINNED_KEY = "db:primary-pinned"
+
+# Replica alias -> time.monotonic() before which it isn't tried again
+_unavailable: dict[str, float] = {}
+
+
+@dataclass
+class Reads:
+    """Where the current request's reads go, and whether it wrote."""
+
+    database: str | None = None
+    wrote: bool = False
+
+
+_reads: ContextVar[Reads | None] = ContextVar("reads", default=None)
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "REPLICA_DATABASES", []))
+
+
+def replica_reads_enabled() -> bool:
+    """Replicas are configured, and every worker sees pin_primary()."""
+    return bool(replicas()) and cache_is_shared()
+
+
+def lag_seconds() -> int:
+    return getattr(settings, "DB_REPLICA_LAG_SECONDS", 10)
+
+
+def pin_primary() -> None:
+    """
+    Send every request's reads to the primary while replicas catch up (in
+    every worker: needs the shared cache, see replica_reads_enabled()).
+    """
+    if replica_reads_enabled():
+        cache.set(_PINNED_KEY, True, lag_seconds())
+
+
+def primary_pinned() -> bool:
+    return bool(cache.get(_PINNED_KEY))
+
+
+def _connects(alias: str) -> bool:
+    if _unavailable.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        logger.warning("Replica %s is unavailable, reading from primary.", alias)
+        retry = getattr(settings, "DB_REPLICA_RETRY_SECONDS", 30)
+        _unavailable[alias] = time.monotonic() + retry
+        return False
+    _unavailable.pop(alias, None)
+    return True
+
+
+def available_replica() -> str | None:
+    """A replica that accepts connections, in random order; None for none."""
+    candidates = replicas()
+    random.shuffle(candidates)
+    return next((alias for alias in candidates if _connects(alias)), None)
+
+
+@contextmanager
+def reading_from(database: str | None):
+    """Route reads to ``database`` (None: the primary) inside the block."""
+    reads = Reads(database)
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        reads = _reads.get()
+        return reads.database if reads else None
+
+    def db_for_write(self, model, **hints):
+        reads = _reads.get()
+        if reads is not None:
+            # Read what was just written
+            reads.database = None
+            reads.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the primary's schema through replication
+        return db not in replicas()
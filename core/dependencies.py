@@ -0,0 +1,181 @@
+# core/dependencies.py
+"""
+Render-time dependency tracking.
+
+While a page or fragment renders inside ``tracking()``, every Page, image,
+document and snippet instance loaded from the database is recorded as a key
+(``page-12``, ``image-3``, ``document-2``, ``snippet-app.model-5``), as are
+listing keys that queries register explicitly with ``record()`` (``bts``,
+``bts-written``: "the newest teasers", which a newly published page can
+join without ever having been loaded).
+
+The keys end up
+- in the page's Surrogate-Key header (core.edge), so the CDN purges
+  exactly the responses that used a published object;
+- in PageDependency rows, which narrow the page's ETag inputs
+  (core.conditional) and tag its 304 responses;
+- next to cached fragments ({% swrcache %}, {% blockcache %}, rich text),
+  which are dropped when any of their keys is invalidated.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import transaction
+from wagtail.documents import get_document_model
+from wagtail.documents.models import AbstractDocument
+from wagtail.images import get_image_model
+from wagtail.images.models import AbstractImage
+from wagtail.models import Page
+from wagtail.snippets.models import get_snippet_models
+
+from .models import PageDependency
+
+_current: ContextVar[set | None] = ContextVar("cache_dependencies", default=None)
+
+# Fragment cache keys registered under a dependency key
+_INDEX_PREFIX = "deps:"
+_INDEX_TTL = 60 * 60 * 24 * 7
+
+
+def page_key(page_id: int) -> str:
+    return f"page-{page_id}"
+
+
+def model_key(model, pk) -> str | None:
+    if issubclass(model, Page):
+        return page_key(pk)
+    if issubclass(model, AbstractImage):
+        return f"image-{pk}"
+    if issubclass(model, AbstractDocument):
+        return f"document-{pk}"
+    if model in get_snippet_models():
+        return f"snippet-{model._meta.label_lower}-{pk}"
+    return None
+
+
+def instance_key(instance) -> str | None:
+    if instance.pk is None:
+        return None
+    return model_key(type(instance), instance.pk)
+
+
+def instance_keys_by_model(keys) -> dict:
+    """
+    The image, document and snippet keys among ``keys`` (inverse of
+    model_key()), as ``{model: [pk, ...]}``. Page and listing keys are left
+    out, and so are snippets of models that no longer exist.
+    """
+    grouped = defaultdict(list)
+    for key in keys:
+        kind, _, rest = key.partition("-")
+        if kind == "image":
+            model, pk = get_image_model(), rest
+        elif kind == "document":
+            model, pk = get_document_model(), rest
+        elif kind == "snippet":
+            label, _, pk = rest.rpartition("-")
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                continue
+        else:
+            continue
+        grouped[model].append(pk)
+    return dict(grouped)
+
+
+@contextmanager
+def tracking(inherit: bool = True):
+    """
+    Collect the keys recorded while the block runs. A nested block starts
+    from what the outer one has recorded so far (a fragment can use context
+    computed before it) unless ``inherit`` is false, and hands its keys back
+    to it on exit.
+    """
+    parent = _current.get()
+    keys = set(parent) if parent is not None and inherit else set()
+    token = _current.set(keys)
+    try:
+        yield keys
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.update(keys)
+
+
+def record(*keys: str) -> None:
+    keys_in_progress = _current.get()
+    if keys_in_progress is not None:
+        keys_in_progress.update(keys)
+
+
+def record_instance(sender, instance, **kwargs):
+    """post_init receiver: a model instance loaded during a tracked render."""
+    if _current.get() is None:
+        return
+    key = instance_key(instance)
+    if key is not None:
+        record(key)
+
+
+# ---------------------------------------------------------------------------
+# Page dependency graph (database)
+# ---------------------------------------------------------------------------
+
+
+def save_page_dependencies(page_id: int, keys) -> None:
+    """Store what the page's latest render used, if it changed."""
+    keys = set(keys) - {page_key(page_id)}
+    stored = set(
+        PageDependency.objects.filter(page_id=page_id).values_list("key", flat=True)
+    )
+    if stored == keys:
+        return
+    with transaction.atomic():
+        PageDependency.objects.filter(page_id=page_id, key__in=stored - keys).delete()
+        PageDependency.objects.bulk_create(
+            [PageDependency(page_id=page_id, key=key) for key in keys - stored],
+            ignore_conflicts=True,
+        )
+
+
+def page_dependency_keys(page_id: int) -> list[str]:
+    return list(
+        PageDependency.objects.filter(page_id=page_id)
+        .order_by("key")
+        .values_list("key", flat=True)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cached fragments
+# ---------------------------------------------------------------------------
+
+
+def register_cached(cache_key: str, keys, cache_alias: str = "default") -> None:
+    """Remember that ``cache_key`` must be dropped when any of ``keys`` is."""
+    cache = caches[cache_alias]
+    index_keys = {key: f"{_INDEX_PREFIX}{key}" for key in keys}
+    existing = cache.get_many(list(index_keys.values()))
+    updates = {}
+    for index_key in index_keys.values():
+        registered = existing.get(index_key, set())
+        if cache_key not in registered:
+            updates[index_key] = registered | {cache_key}
+    if updates:
+        cache.set_many(updates, _INDEX_TTL)
+
+
+def invalidate_cached(keys, cache_alias: str = "default") -> None:
+    """Drop every cached fragment registered under one of ``keys``."""
+    cache = caches[cache_alias]
+    index_keys = [f"{_INDEX_PREFIX}{key}" for key in keys]
+    stale = set()
+    for registered in cache.get_many(index_keys).values():
+        stale |= registered
+    cache.delete_many(list(stale) + index_keys)
@@ -0,0 +1,63 @@
+# core/edge.py
+"""
+Edge (CDN) caching for pages: lifetimes per page type and surrogate keys.
+
+Responses are tagged by EdgeCacheMiddleware with the keys recorded while
+they rendered (core.dependencies); publishing a page purges the keys whose
+responses it can change, through the configured purge backend (core.purge).
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from wagtail.models import Page
+
+from .db_routers import pin_primary
+from .dependencies import invalidate_cached, page_key
+from .purge import get_purge_backend
+
+
+def max_age_for(page) -> int:
+    """s-maxage for a page type: ``EDGE_CACHE_MAX_AGE[<app_label.model>]``."""
+    max_ages = getattr(settings, "EDGE_CACHE_MAX_AGE", {})
+    return max_ages.get(page._meta.label_lower, max_ages.get("default", 600))
+
+
+def surrogate_keys(page, recorded) -> list[str]:
+    """The page's own key first, then everything its render used."""
+    own = page_key(page.pk)
+    return [own] + sorted(set(recorded) - {own})
+
+
+def purge_keys(page) -> list[str]:
+    """
+    Keys to purge when ``page`` is published, unpublished or deleted: the
+    page and its translations (language switcher), plus
+    ``page.get_purge_keys()`` for both the new and the replaced version
+    (listings it appears in; see remember_purge_keys in
+    core.signal_handlers).
+    """
+    keys = {page_key(page.pk)}
+    keys.update(
+        page_key(pk)
+        for pk in Page.objects.filter(translation_key=page.translation_key)
+        .exclude(pk=page.pk)
+        .values_list("pk", flat=True)
+    )
+    get_purge_keys = getattr(page, "get_purge_keys", None)
+    if get_purge_keys is not None:
+        keys.update(get_purge_keys())
+    keys.update(getattr(page, "_previous_purge_keys", ()))
+    return sorted(keys)
+
+
+def invalidate(keys) -> None:
+    """
+    Drop everything built from ``keys``: cached fragments (kept only in a
+    shared cache, see core.cache.cache_is_shared), then the CDN copies of
+    the responses tagged with them.
+    """
+    keys = sorted(set(keys))
+    # Not refilled from a replica that hasn't caught up
+    pin_primary()
+    invalidate_cached(keys)
+    get_purge_backend().purge(keys)
@@ -0,0 +1,76 @@
+# core/embeds.py
+"""
+Cached embed HTML.
+
+Wagtail's ``{% embed %}`` tag looks its oEmbed response up in the database
+once per tag, so a list of videos costs a query per item (two where the
+template embeds each one twice). The HTML is cached here by Wagtail's own
+embed hash, and ``embed_html_many()`` loads all of a render's missing
+embeds in one query. Entries expire with the embed's ``cache_until``.
+Templates use it through ``{% cached_embed %}`` (core.templatetags.embed_cache).
+"""
+from __future__ import annotations
+
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+from wagtail.embeds import embeds
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.embeds.exceptions import EmbedException
+from wagtail.embeds.models import Embed
+
+from .timing import record
+
+
+def _ttl(embed: Embed) -> int:
+    ttl = getattr(settings, "EMBED_CACHE_TTL", 60 * 60 * 24)
+    if embed.cache_until is not None:
+        ttl = min(ttl, int((embed.cache_until - now()).total_seconds()))
+    return max(ttl, 1)
+
+
+def embed_html_many(urls: Iterable[str], max_width=None) -> dict[str, str]:
+    """``{% embed url max_width %}``'s HTML for each of ``urls``."""
+    hashes = {url: get_embed_hash(url, max_width) for url in set(urls) if url}
+    keys = {url: f"embed:{embed_hash}" for url, embed_hash in hashes.items()}
+    cached = cache.get_many(list(keys.values()))
+
+    missing = [url for url, key in keys.items() if key not in cached]
+    if missing:
+        stored = {
+            embed.hash: embed
+            for embed in Embed.objects.exclude(cache_until__lte=now()).filter(
+                hash__in=[hashes[url] for url in missing]
+            )
+        }
+        for url in missing:
+            embed = stored.get(hashes[url])
+            if embed is None:
+                # Never fetched (or expired): ask the provider, as Wagtail does
+                start = time.perf_counter()
+                try:
+                    embed = embeds.get_embed(url, max_width=max_width)
+                except EmbedException:
+                    cached[keys[url]] = ""
+                    continue
+                finally:
+                    # Counted when saved (core.signal_handlers)
+                    record("embed", time.perf_counter() - start, count=0)
+            cached[keys[url]] = embed.html
+            cache.set(keys[url], embed.html, _ttl(embed))
+
+    return {url: cached[key] for url, key in keys.items()}
+
+
+def embed_html(url: str, max_width=None) -> str:
+    if not url:
+        return ""
+    return embed_html_many([url], max_width)[url]
+
+
+def prefetch_embeds(*urls: str) -> None:
+    """Load ``urls`` in one pass so ``{% cached_embed %}`` tags hit the cache."""
+    embed_html_many(urls)
@@ -0,0 +1,64 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the database connection handling of simulated requests: a new "
+        "connection per request against the configured reuse (pool or "
+        "persistent connections)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        count = options["requests"]
+
+        fresh = self.time_requests(count, connection, fresh=True)
+        reused = self.time_requests(count, connection, fresh=False)
+
+        if "pool" in connection.settings_dict["OPTIONS"]:
+            mode = "pool"
+        else:
+            mode = f"CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}"
+        self.stdout.write(f"{count} requests, one query each:")
+        self.stdout.write(f"  new connection per request: {fresh * 1000:.3f} ms")
+        self.stdout.write(f"  configured ({mode}): {reused * 1000:.3f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Connection overhead per request: {(fresh - reused) * 1000:.3f} ms"
+            )
+        )
+
+    def unpooled(self, connection):
+        """A wrapper with the same settings, but neither pooled nor persistent."""
+        settings_dict = {**connection.settings_dict, "CONN_MAX_AGE": 0}
+        settings_dict["OPTIONS"] = {
+            key: value
+            for key, value in settings_dict["OPTIONS"].items()
+            if key != "pool"
+        }
+        return connection.__class__(settings_dict, alias="benchmark")
+
+    def time_requests(self, count: int, connection, fresh: bool) -> float:
+        """Mean seconds per request, as Django opens and closes connections."""
+        if fresh:
+            connection = self.unpooled(connection)
+        start = perf_counter()
+        for _ in range(count):
+            # close_old_connections runs on both signals, as for a real request
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            request_finished.send(sender=self.__class__)
+            if fresh:
+                connection.close()
+        elapsed = perf_counter() - start
+        connection.close()
+        return elapsed / count
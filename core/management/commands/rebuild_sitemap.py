@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SitemapEntry
+from core.sitemap import rebuild_sitemap
+
+
+class Command(BaseCommand):
+    help = "Rebuild every sitemap entry and rewrite the stored sitemap files."
+
+    def handle(self, *args, **options):
+        rebuild_sitemap()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt sitemap with {SitemapEntry.objects.count()} URLs."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import cache_is_shared
+from core.routing import warm_routes
+
+
+class Command(BaseCommand):
+    help = (
+        "Cache the route (path -> page) of every live page of every site. "
+        "Only with a shared cache (SHARED_CACHE): a per-process cache would "
+        "be filled for this command alone."
+    )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            self.stdout.write("No shared cache (SHARED_CACHE): nothing to warm.")
+            return
+        count = warm_routes()
+
+        self.stdout.write(self.style.SUCCESS(f"Cached {count} page routes."))
@@ -0,0 +1,185 @@
+# core/metrics.py
+"""
+Process metrics, shared by every worker, in the Prometheus text format.
+
+Each process adds up its samples in memory and folds them into one SQLite
+file under ``METRICS_DIR`` at most every ``METRICS_FLUSH_SECONDS`` (and when
+it exits); SQLite's locking makes that safe across gunicorn workers, and the
+totals outlive the workers ``--max-requests`` recycles. The ``/metrics``
+view (core.views.metrics) reads the file back for a local scraper.
+
+Recorded:
+
+- ``http_request_duration_seconds``: latency histogram by Wagtail page type
+  (empty for other views) and view name (MetricsMiddleware);
+- ``db_queries_total``: queries, by the same labels;
+- ``cache_requests_total``: reads by cache alias and hit / miss
+  (core.cache_backends);
+- ``generated_total``: QR codes, vCards, renditions and embeds generated.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# name -> (type, help)
+METRICS = {
+    "http_request_duration_seconds": (
+        "histogram",
+        "Request latency by Wagtail page type and view.",
+    ),
+    "db_queries_total": ("counter", "Database queries by page type and view."),
+    "cache_requests_total": ("counter", "Cache reads by cache alias and result."),
+    "generated_total": (
+        "counter",
+        "QR codes, vCards, image renditions and embeds generated.",
+    ),
+}
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name, rendered labels) -> value not yet in the store
+_pending: dict[tuple[str, str], float] = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _labels(labels: dict) -> str:
+    return ",".join(
+        f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())
+    )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _add(samples: list[tuple[str, str, float]]) -> None:
+    with _lock:
+        for name, labels, value in samples:
+            _pending[name, labels] = _pending.get((name, labels), 0) + value
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """Add ``amount`` to a counter."""
+    if amount:
+        _add([(name, _labels(labels), amount)])
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record ``value`` in a histogram."""
+    rendered = _labels(labels)
+    prefix = f"{rendered}," if rendered else ""
+    # Empty buckets too: every series needs all of them
+    samples = [
+        (f"{name}_bucket", f'{prefix}le="{bound}"', int(value <= bound))
+        for bound in BUCKETS
+    ]
+    samples += [
+        (f"{name}_bucket", f'{prefix}le="+Inf"', 1),
+        (f"{name}_sum", rendered, value),
+        (f"{name}_count", rendered, 1),
+    ]
+    _add(samples)
+
+
+def _path() -> str:
+    directory = getattr(settings, "METRICS_DIR", "") or os.path.join(
+        tempfile.gettempdir(), "miriamgradel-metrics"
+    )
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, "metrics.sqlite3")
+
+
+def _connect() -> sqlite3.Connection:
+    # A connection per flush: cheap at this rate, and never shared across
+    # a fork (gunicorn --preload)
+    connection = sqlite3.connect(_path(), timeout=5)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS samples ("
+        " name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,"
+        " PRIMARY KEY (name, labels))"
+    )
+    return connection
+
+
+def flush(force: bool = True) -> None:
+    """
+    Fold this process's samples into the store; unless ``force``, only once
+    ``METRICS_FLUSH_SECONDS`` have passed since the last time.
+    """
+    global _last_flush
+    interval = getattr(settings, "METRICS_FLUSH_SECONDS", 5)
+    with _lock:
+        if not force and time.monotonic() - _last_flush < interval:
+            return
+        _last_flush = time.monotonic()
+        samples = [(name, labels, value) for (name, labels), value in _pending.items()]
+        _pending.clear()
+    if not samples:
+        return
+    try:
+        connection = _connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO samples (name, labels, value) VALUES (?, ?, ?)"
+                    " ON CONFLICT (name, labels)"
+                    " DO UPDATE SET value = value + excluded.value",
+                    samples,
+                )
+        finally:
+            connection.close()
+    except (OSError, sqlite3.Error):
+        logger.warning("Could not write metrics, will retry.", exc_info=True)
+        _add(samples)
+
+
+atexit.register(flush)
+# A forked worker starts from nothing: its parent reports its own samples
+os.register_at_fork(after_in_child=_pending.clear)
+
+
+def _sort_key(sample: tuple[str, str, float]):
+    name, labels, _ = sample
+    if name.endswith("_bucket"):
+        others, _, bound = labels.rpartition('le="')
+        return name, others, float(bound.rstrip('"'))
+    return name, labels, 0.0
+
+
+def exposition() -> str:
+    """Every worker's metrics, in the Prometheus text format."""
+    flush()
+    connection = _connect()
+    try:
+        samples = connection.execute(
+            "SELECT name, labels, value FROM samples"
+        ).fetchall()
+    finally:
+        connection.close()
+
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        names = (
+            {f"{metric}_bucket", f"{metric}_sum", f"{metric}_count"}
+            if kind == "histogram"
+            else {metric}
+        )
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, labels, value in sorted(
+            (sample for sample in samples if sample[0] in names), key=_sort_key
+        ):
+            value = int(value) if float(value).is_integer() else value
+            lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapEntry',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='wagtailcore.page')),
+                ('translation_key', models.UUIDField(db_index=True)),
+                ('language_code', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=512)),
+                ('lastmod', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['path'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SitemapFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('content', models.BinaryField()),
+                ('etag', models.CharField(max_length=64)),
+                ('last_modified', models.DateTimeField()),
+            ],
+        ),
+    ]
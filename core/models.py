@@ -0,0 +1,73 @@
+# core/models.py
+from __future__ import annotations
+
+from django.db import models
+
+
+class SitemapEntry(models.Model):
+    """
+    One ``<url>`` of sitemap.xml, kept up to date per page on publish
+    (see core.sitemap). Writing the sitemap reads this table only, never the
+    page tree.
+    """
+
+    page = models.OneToOneField(
+        "wagtailcore.Page",
+        on_delete=models.CASCADE,
+        related_name="+",
+        primary_key=True,
+    )
+    # Pages sharing a translation_key are the same page in other locales:
+    # they become each other's hreflang alternates.
+    translation_key = models.UUIDField(db_index=True)
+    language_code = models.CharField(max_length=100)
+    path = models.CharField(max_length=255)
+    location = models.CharField(max_length=512)
+    lastmod = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["path"]
+
+    def __str__(self):
+        return self.location
+
+
+class SitemapFile(models.Model):
+    """
+    A rendered, gzipped sitemap document served as-is by core.views.sitemap:
+    ``sitemap.xml`` (a urlset, or an index once the site outgrows one file)
+    and ``sitemap-<n>.xml`` sections.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    content = models.BinaryField()
+    etag = models.CharField(max_length=64)
+    last_modified = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+
+class PageDependency(models.Model):
+    """
+    One thing a page's last full render used (see core.dependencies): a page
+    (``page-<id>``), image (``image-<id>``), snippet, or a listing such as
+    ``bts-written``. Publishing that thing purges the pages pointing at it.
+    """
+
+    page = models.ForeignKey(
+        "wagtailcore.Page",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    key = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["page", "key"], name="page_dependency_unique_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.page_id} -> {self.key}"
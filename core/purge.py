@@ -0,0 +1,89 @@
+# core/purge.py
+"""
+Purge backends for the edge cache (see core.edge). Configured with
+``EDGE_CACHE_PURGE_BACKEND`` / ``EDGE_CACHE_PURGE_OPTIONS``.
+"""
+from __future__ import annotations
+
+import logging
+import urllib.request
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BasePurgeBackend:
+    def __init__(self, **options):
+        self.options = options
+
+    def purge(self, keys: list[str]) -> None:
+        raise NotImplementedError
+
+
+class NullPurgeBackend(BasePurgeBackend):
+    """No CDN in front of the site: nothing to purge."""
+
+    def purge(self, keys):
+        pass
+
+
+class LocalPurgeBackend(BasePurgeBackend):
+    """
+    Stand-in CDN for tests and local development: remembers every purge
+    in ``LocalPurgeBackend.purged`` (one list of keys per call).
+    """
+
+    purged: list[list[str]] = []
+
+    def purge(self, keys):
+        self.purged.append(list(keys))
+
+    @classmethod
+    def reset(cls):
+        cls.purged.clear()
+
+
+class FastlyPurgeBackend(BasePurgeBackend):
+    """
+    Fastly surrogate-key purge. Soft purges mark objects stale instead of
+    evicting them, so ``stale-while-revalidate`` keeps covering traffic while
+    the origin re-renders.
+    """
+
+    API_URL = "https://api.fastly.com/service/{service_id}/purge"
+    # Fastly accepts at most 256 keys per batch purge
+    BATCH_SIZE = 256
+
+    def __init__(self, service_id: str, api_token: str, soft: bool = True, **options):
+        super().__init__(**options)
+        self.service_id = service_id
+        self.api_token = api_token
+        self.soft = soft
+
+    def purge(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start : start + self.BATCH_SIZE]
+            request = urllib.request.Request(
+                self.API_URL.format(service_id=self.service_id),
+                method="POST",
+                headers={
+                    "Fastly-Key": self.api_token,
+                    "Surrogate-Key": " ".join(batch),
+                    **({"Fastly-Soft-Purge": "1"} if self.soft else {}),
+                },
+            )
+            with urllib.request.urlopen(request, timeout=10) as response:
+                logger.info(
+                    "Fastly purge of %d keys: HTTP %s", len(batch), response.status
+                )
+
+
+def get_purge_backend() -> BasePurgeBackend:
+    backend = getattr(
+        settings, "EDGE_CACHE_PURGE_BACKEND", "core.purge.NullPurgeBackend"
+    )
+    options = getattr(settings, "EDGE_CACHE_PURGE_OPTIONS", {})
+    return import_string(backend)(**options)
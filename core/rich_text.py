@@ -0,0 +1,169 @@
+# core/rich_text.py
+"""
+Cached rich text expansion.
+
+Expanding stored rich text (``expand_db_html``) rewrites every internal
+page, document and image reference, with a query per link type and per
+field. Expanded HTML is cached here under a hash of the stored source, and
+``expand_many()`` expands all of a render's missing sources in a single
+pass, so the links of a whole page cost one query per link type (page
+links included: BulkPageLinkHandler localizes them in bulk too).
+
+Each entry is registered under the pages, documents and images it links to
+(core.dependencies): publishing, moving or deleting one of them drops it.
+Without a shared cache (SHARED_CACHE) the other workers would not see
+that, so expansions are only kept for the page render in progress
+(``rendering()``): its links still cost one pass.
+"""
+from __future__ import annotations
+
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.html import escape
+from django.utils.translation import get_language
+from wagtail.fields import RichTextField, StreamField
+from wagtail.models import Locale, Page
+from wagtail.rich_text import (
+    RichText,
+    expand_db_html,
+    extract_references_from_rich_text,
+)
+from wagtail.rich_text.pages import PageLinkHandler
+
+from .cache import cache_is_shared
+from .dependencies import model_key, record, register_cached
+from .streamfield import iter_block_values
+
+# Survives expansion untouched: only <a linktype> and <embed> are rewritten
+_SEPARATOR = "<!--rich-text-->"
+
+# Expansions of the render in progress, when they can't be cached
+_rendering: ContextVar[dict | None] = ContextVar("rich_text_rendering", default=None)
+
+
+class BulkPageLinkHandler(PageLinkHandler):
+    """
+    Wagtail's page link handler looks up ``page.localized`` once per link;
+    this one finds all the translations in the active locale at once.
+    """
+
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list: list[dict]) -> list[str]:
+        pages = localized_pages(cls.get_many(attrs_list))
+        return [
+            '<a href="%s">' % escape(page.url) if page else "<a>" for page in pages
+        ]
+
+
+def localized_pages(pages: list) -> list:
+    """``[page.localized for page in pages]``, in one query (None stays None)."""
+    if not getattr(settings, "WAGTAIL_I18N_ENABLED", False):
+        return pages
+    try:
+        locale = Locale.get_active()
+    except (LookupError, Locale.DoesNotExist):
+        return pages
+
+    other_locale = {
+        page.translation_key for page in pages if page and page.locale_id != locale.pk
+    }
+    if not other_locale:
+        return pages
+    translations = {
+        page.translation_key: page
+        for page in Page.objects.live()
+        .filter(locale=locale, translation_key__in=other_locale)
+        .specific(defer=True)
+    }
+    return [
+        translations.get(page.translation_key, page) if page else None
+        for page in pages
+    ]
+
+
+def _cache_key(source: str) -> str:
+    digest = hashlib.sha1(source.encode()).hexdigest()
+    # Page links point to the translation in the active language
+    return f"richtext:{digest}:{get_language()}"
+
+
+def _dependency_keys(source: str) -> list[str]:
+    keys = {
+        model_key(model, object_id)
+        for model, object_id, *_ in extract_references_from_rich_text(source)
+    }
+    keys.discard(None)
+    return sorted(keys)
+
+
+def expand_many(sources: Iterable[str]) -> dict[str, str]:
+    """Expanded HTML for each of ``sources``, from the cache where possible."""
+    keys = {source: _cache_key(source) for source in set(sources) if source}
+    shared = cache_is_shared()
+    if shared:
+        cached = cache.get_many(list(keys.values()))
+    else:
+        rendered = _rendering.get() or {}
+        cached = {key: rendered[key] for key in keys.values() if key in rendered}
+
+    missing = [source for source, key in keys.items() if key not in cached]
+    if missing:
+        expanded = expand_db_html(_SEPARATOR.join(missing)).split(_SEPARATOR)
+        if len(expanded) != len(missing):
+            # A source contained the separator itself
+            expanded = [expand_db_html(source) for source in missing]
+        entries = {}
+        for source, html in zip(missing, expanded):
+            entries[keys[source]] = (html, _dependency_keys(source))
+        if shared:
+            for key, (_, dependencies) in entries.items():
+                register_cached(key, dependencies)
+            ttl = getattr(settings, "RICH_TEXT_CACHE_TTL", 60 * 60 * 24)
+            cache.set_many(entries, ttl)
+        elif _rendering.get() is not None:
+            _rendering.get().update(entries)
+        cached.update(entries)
+
+    html = {}
+    for source, key in keys.items():
+        html[source], dependencies = cached[key]
+        record(*dependencies)
+    return html
+
+
+@contextmanager
+def rendering():
+    """Keep uncacheable expansions until the end of a render."""
+    token = _rendering.set({})
+    try:
+        yield
+    finally:
+        _rendering.reset(token)
+
+
+def expand(source: str) -> str:
+    if not source:
+        return ""
+    return expand_many([source])[source]
+
+
+def rich_text_sources(page) -> Iterable[str]:
+    """Stored rich text in the page's own fields and StreamFields."""
+    for field in page._meta.concrete_fields:
+        value = getattr(page, field.attname)
+        if isinstance(field, RichTextField):
+            yield value
+        elif isinstance(field, StreamField):
+            for leaf in iter_block_values(value):
+                if isinstance(leaf, RichText):
+                    yield leaf.source
+
+
+def prefetch_rich_text(*sources: str) -> None:
+    """Expand ``sources`` in one pass so the |cached_richtext filters hit the cache."""
+    expand_many(sources)
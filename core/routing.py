@@ -0,0 +1,109 @@
+# core/routing.py
+"""
+Route cache for Wagtail page serving.
+
+Wagtail routes a request by finding its Site, localizing the root page and
+walking the tree one slug at a time (a query or two per level). Here the
+outcome — page id, content type and url_path — is cached per host,
+language and path, so serving a known URL starts with one cache hit and one
+query for the page itself (see RouteCacheMiddleware).
+
+Entries carry a version that any structural change (publish, unpublish,
+move, slug change, delete) bumps: every route is looked up again after
+one. That only reaches other workers with a shared cache, so an entry is
+also only used while the page is still live at the url_path it was cached
+with; a moved or renamed page is routed again by every worker.
+``warm_routes()`` (the warm_route_cache command) fills a shared cache for
+every live page ahead of traffic.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from wagtail.models import Page, Site
+from wagtail.url_routing import RouteResult
+
+from .db_routers import pin_primary
+
+_VERSION_KEY = "routes:version"
+
+
+def _version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _route_key(host: str, language: str, path: str) -> str:
+    digest = hashlib.sha1(path.encode()).hexdigest()
+    return f"routes:{_version()}:{host}:{language}:{digest}"
+
+
+def invalidate_routes() -> None:
+    """Forget every cached route (a new version; old entries age out)."""
+    pin_primary()
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+def _ttl() -> int:
+    return getattr(settings, "ROUTE_CACHE_TTL", 60 * 60 * 24)
+
+
+def cached_route(host: str, language: str, path: str) -> RouteResult | None:
+    entry = cache.get(_route_key(host, language, path))
+    if entry is None:
+        return None
+    page_id, content_type_id, url_path = entry
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    page = model.objects.filter(pk=page_id, live=True).first() if model else None
+    if page is None or page.url_path != url_path:
+        # Unpublished, moved or renamed since (in any worker)
+        return None
+    return RouteResult(page)
+
+
+def remember_route(host: str, language: str, path: str, route) -> None:
+    """
+    Cache a route Wagtail resolved, if it is plain tree routing: the page
+    at ``path`` itself, with no arguments from a custom ``route()``.
+    """
+    if route is None:
+        return
+    page, args, kwargs = route
+    if args or kwargs or not page.url_path.endswith("/" + path):
+        return
+    cache.set(
+        _route_key(host, language, path),
+        (page.pk, page.content_type_id, page.url_path),
+        _ttl(),
+    )
+
+
+def _site_host(site: Site) -> str:
+    if site.port in (80, 443):
+        return site.hostname
+    return f"{site.hostname}:{site.port}"
+
+
+def warm_routes() -> int:
+    """Cache the route of every live page of every site; returns the count."""
+    entries = {}
+    for site in Site.objects.select_related("root_page"):
+        host = _site_host(site)
+        roots = site.root_page.get_translations(inclusive=True).select_related(
+            "locale"
+        )
+        for root in roots:
+            pages = Page.objects.live().descendant_of(root, inclusive=True)
+            for entry in pages.values_list("pk", "content_type_id", "url_path"):
+                path = entry[2][len(root.url_path) :]
+                key = _route_key(host, root.locale.language_code, path)
+                entries[key] = entry
+    cache.set_many(entries, _ttl())
+    return len(entries)
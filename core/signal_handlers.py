@@ -0,0 +1,141 @@
+# core/signal_handlers.py
+from __future__ import annotations
+
+import time
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from wagtail.documents import get_document_model
+from wagtail.embeds.models import Embed
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site, get_page_models
+from wagtail.snippets.models import get_snippet_models
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from . import metrics
+from .dependencies import instance_key, page_key, record_instance
+from .edge import purge_keys
+from .routing import invalidate_routes
+from .sites import invalidate_sites
+from .tasks import purge_edge_cache_task, update_sitemap_task
+from .timing import record
+
+
+def _subtree_ids(page) -> list[int]:
+    return list(
+        Page.objects.descendant_of(page, inclusive=True).values_list("pk", flat=True)
+    )
+
+
+def page_published_signal_handler(instance, **kwargs):
+    transaction.on_commit(invalidate_routes)
+    update_sitemap_task.enqueue([instance.pk])
+    purge_edge_cache_task.enqueue(purge_keys(instance))
+
+
+def page_unpublished_signal_handler(instance, **kwargs):
+    transaction.on_commit(invalidate_routes)
+    update_sitemap_task.enqueue([instance.pk])
+    purge_edge_cache_task.enqueue(purge_keys(instance))
+
+
+def page_subtree_changed_signal_handler(instance, **kwargs):
+    """Slug change or move: every URL below the page changed with it."""
+    transaction.on_commit(invalidate_routes)
+    # Site roots' url_paths are in the registry
+    transaction.on_commit(invalidate_sites)
+    page_ids = _subtree_ids(instance)
+    update_sitemap_task.enqueue(page_ids)
+    # Cached copies at the old URLs, and everything linking to them
+    purge_edge_cache_task.enqueue([page_key(pk) for pk in page_ids])
+
+
+def remember_purge_keys(sender, instance, **kwargs):
+    """
+    Keep the purge keys of the version being replaced, e.g. a BTS page's old
+    category when an edit moves it to another one (see core.edge.purge_keys).
+    """
+    if instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._previous_purge_keys = previous.get_purge_keys()
+
+
+def view_restriction_changed_signal_handler(instance, **kwargs):
+    # Private pages stay out of the sitemap and the edge cache, and so do
+    # their descendants
+    page_ids = _subtree_ids(instance.page)
+    update_sitemap_task.enqueue(page_ids)
+    purge_edge_cache_task.enqueue([page_key(pk) for pk in page_ids])
+
+
+def page_deleted_signal_handler(sender, instance, **kwargs):
+    if sender is Page and instance.specific_class is not Page:
+        # Deleting a specific page deletes its Page row too: handle it once,
+        # with the specific instance (it knows its purge keys)
+        return
+    transaction.on_commit(invalidate_routes)
+    # The entry went with the page (CASCADE); only the files need rewriting
+    update_sitemap_task.enqueue([])
+    purge_edge_cache_task.enqueue(purge_keys(instance))
+
+
+def instance_changed_signal_handler(instance, **kwargs):
+    """An image, document or snippet was edited or deleted: purge what used it."""
+    purge_edge_cache_task.enqueue([instance_key(instance)])
+
+
+def rendition_saving_signal_handler(instance, **kwargs):
+    if instance._state.adding:
+        instance._saving_started = time.perf_counter()
+
+
+def generated_signal_handler(sender, instance, created, **kwargs):
+    """
+    A rendition was generated or an embed fetched (core.timing, metrics).
+    A new rendition's time is its save: storing the file, an upload with
+    Cloudinary. Embed fetches are timed where they happen (core.embeds).
+    """
+    if created:
+        kind = "embed" if sender is Embed else "rendition"
+        started = getattr(instance, "_saving_started", None)
+        record(kind, time.perf_counter() - started if started else 0.0)
+        metrics.inc("generated_total", kind=kind)
+
+
+def site_changed_signal_handler(**kwargs):
+    transaction.on_commit(invalidate_sites)
+    transaction.on_commit(invalidate_routes)
+
+
+def register_signal_handlers():
+    post_init.connect(record_instance)
+    page_published.connect(page_published_signal_handler)
+    page_unpublished.connect(page_unpublished_signal_handler)
+    page_slug_changed.connect(page_subtree_changed_signal_handler)
+    post_page_move.connect(page_subtree_changed_signal_handler)
+    post_save.connect(
+        view_restriction_changed_signal_handler, sender=PageViewRestriction
+    )
+    post_delete.connect(
+        view_restriction_changed_signal_handler, sender=PageViewRestriction
+    )
+    rendition_model = get_image_model().get_rendition_model()
+    pre_save.connect(rendition_saving_signal_handler, sender=rendition_model)
+    post_save.connect(generated_signal_handler, sender=rendition_model)
+    post_save.connect(generated_signal_handler, sender=Embed)
+    post_save.connect(site_changed_signal_handler, sender=Site)
+    post_delete.connect(site_changed_signal_handler, sender=Site)
+    for model in get_page_models():
+        post_delete.connect(page_deleted_signal_handler, sender=model)
+        if hasattr(model, "get_purge_keys"):
+            pre_save.connect(remember_purge_keys, sender=model)
+    for model in [get_image_model(), get_document_model(), *get_snippet_models()]:
+        post_save.connect(instance_changed_signal_handler, sender=model)
+        post_delete.connect(instance_changed_signal_handler, sender=model)
@@ -0,0 +1,173 @@
+# core/sitemap.py
+from __future__ import annotations
+
+import gzip
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from wagtail.coreutils import get_supported_content_language_variant
+from wagtail.models import Page
+
+from .models import SitemapEntry, SitemapFile
+from .sites import default_site
+
+INDEX_NAME = "sitemap.xml"
+
+
+def section_name(number: int) -> str:
+    return f"sitemap-{number}.xml"
+
+
+def _public_pages():
+    return (
+        Page.objects.live()
+        .public()
+        .filter(depth__gt=1)
+        .select_related("locale")
+        .order_by("path")
+    )
+
+
+def _build_entries(pages):
+    for page in pages:
+        location = page.get_full_url()
+        if not location:
+            # Not under any Site: not reachable, so not in the sitemap
+            continue
+        yield SitemapEntry(
+            page_id=page.pk,
+            translation_key=page.translation_key,
+            language_code=page.locale.language_code,
+            path=page.path,
+            location=location,
+            lastmod=page.last_published_at or page.latest_revision_created_at,
+        )
+
+
+def sync_page_entries(page_ids) -> None:
+    """
+    Bring the entries for ``page_ids`` in line with the tree: live, public,
+    routable pages get a row, anything else loses theirs.
+    """
+    page_ids = list(page_ids)
+    with transaction.atomic():
+        SitemapEntry.objects.filter(page_id__in=page_ids).delete()
+        SitemapEntry.objects.bulk_create(
+            _build_entries(_public_pages().filter(pk__in=page_ids))
+        )
+
+
+def rebuild_entries() -> None:
+    with transaction.atomic():
+        SitemapEntry.objects.all().delete()
+        SitemapEntry.objects.bulk_create(
+            _build_entries(_public_pages().iterator()), batch_size=500
+        )
+
+
+def _alternates(entries) -> dict:
+    """hreflang links per translation_key, for pages that exist in 2+ locales."""
+    default_language = get_supported_content_language_variant(settings.LANGUAGE_CODE)
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[entry.translation_key].append(entry)
+
+    alternates = {}
+    for key, group in groups.items():
+        if len(group) < 2:
+            continue
+        links = [
+            {"lang_code": entry.language_code, "location": entry.location}
+            for entry in sorted(group, key=lambda e: e.language_code)
+        ]
+        for entry in group:
+            if entry.language_code == default_language:
+                links.append({"lang_code": "x-default", "location": entry.location})
+        alternates[key] = links
+    return alternates
+
+
+def _site_root_url() -> str:
+    site = default_site()
+    return site.root_url if site else ""
+
+
+def render_sitemap_documents() -> dict[str, str]:
+    """
+    XML for every sitemap file, keyed by file name. One urlset while the site
+    fits in ``SITEMAP_MAX_URLS``; past that, ``sitemap.xml`` becomes an index
+    over ``sitemap-<n>.xml`` sections.
+    """
+    entries = list(SitemapEntry.objects.all())
+    alternates = _alternates(entries)
+    urls = [
+        {
+            "location": entry.location,
+            "lastmod": entry.lastmod,
+            "alternates": alternates.get(entry.translation_key, []),
+        }
+        for entry in entries
+    ]
+
+    size = getattr(settings, "SITEMAP_MAX_URLS", 50000)
+    chunks = [urls[i : i + size] for i in range(0, len(urls), size)] or [[]]
+    if len(chunks) == 1:
+        return {INDEX_NAME: render_to_string("sitemap.xml", {"urlset": chunks[0]})}
+
+    documents = {}
+    sections = []
+    root_url = _site_root_url()
+    for number, chunk in enumerate(chunks, start=1):
+        name = section_name(number)
+        documents[name] = render_to_string("sitemap.xml", {"urlset": chunk})
+        sections.append(
+            {
+                "location": f"{root_url}/{name}",
+                "last_mod": max(
+                    (url["lastmod"] for url in chunk if url["lastmod"]), default=None
+                ),
+            }
+        )
+    documents[INDEX_NAME] = render_to_string(
+        "sitemap_index.xml", {"sitemaps": sections}
+    )
+    return documents
+
+
+def write_sitemap_files() -> None:
+    """
+    Store the rendered documents gzipped. Files whose XML did not change keep
+    their ETag and Last-Modified, so crawlers keep getting 304s for them.
+    """
+    documents = render_sitemap_documents()
+    now = timezone.now()
+    with transaction.atomic():
+        etags = dict(SitemapFile.objects.values_list("name", "etag"))
+        for name, xml in documents.items():
+            data = xml.encode("utf-8")
+            etag = hashlib.sha1(data).hexdigest()
+            if etags.get(name) == etag:
+                continue
+            SitemapFile.objects.update_or_create(
+                name=name,
+                defaults={
+                    "content": gzip.compress(data, mtime=0),
+                    "etag": etag,
+                    "last_modified": now,
+                },
+            )
+        SitemapFile.objects.exclude(name__in=documents).delete()
+
+
+def update_sitemap(page_ids) -> None:
+    sync_page_entries(page_ids)
+    write_sitemap_files()
+
+
+def rebuild_sitemap() -> None:
+    rebuild_entries()
+    write_sitemap_files()
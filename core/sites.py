@@ -0,0 +1,95 @@
+# core/sites.py
+"""
+Process-wide Site registry.
+
+Wagtail finds the Site for a request with a query (cached only on that
+request), and ``Site.objects.filter(is_default_site=True)`` lookups repeat it
+wherever an absolute URL is built. The handful of Site rows are loaded here
+once per process instead, and matched against requests in memory.
+
+Saving or deleting a Site (or renaming / moving a site root) bumps a version
+in the shared cache; each process reloads its registry when it sees a new
+one. Without a shared cache (SHARED_CACHE) the other workers would never
+see the bump, so the rows are loaded for each use instead, once per request
+as Wagtail does. Callers get copies, never the registry's own instances.
+"""
+from __future__ import annotations
+
+import copy
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.http.request import split_domain_port
+from wagtail.models import Site
+
+from .cache import cache_is_shared
+from .db_routers import pin_primary
+
+_VERSION_KEY = "sites:version"
+
+_registry: tuple[int, tuple[Site, ...]] | None = None
+
+
+def _version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def invalidate_sites() -> None:
+    """Make every process reload its registry on next use."""
+    pin_primary()
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+def _load() -> tuple[Site, ...]:
+    # The root's url_path scopes queries to the site's tree without loading
+    # (and sharing) the root page itself
+    sites = Site.objects.annotate(root_url_path=F("root_page__url_path"))
+    return tuple(sites.order_by("pk"))
+
+
+def _sites() -> tuple[Site, ...]:
+    global _registry
+    if not cache_is_shared():
+        return _load()
+    version = _version()
+    if _registry is None or _registry[0] != version:
+        _registry = version, _load()
+    return _registry[1]
+
+
+def _match(sites, hostname: str, port: int) -> Site | None:
+    """Site.find_for_request's choice (see wagtail.models.sites), in memory."""
+    default = next((site for site in sites if site.is_default_site), None)
+    by_hostname = [site for site in sites if site.hostname == hostname]
+    for site in by_hostname:
+        if site.port == port:
+            return site
+    if default is not None and default.hostname == hostname:
+        return default
+    if len(by_hostname) == 1:
+        return by_hostname[0]
+    return default
+
+
+def default_site() -> Site | None:
+    site = next((site for site in _sites() if site.is_default_site), None)
+    return copy.copy(site) if site is not None else None
+
+
+def site_for_request(request) -> Site | None:
+    """
+    The request's Site, also stored where ``Site.find_for_request`` (and
+    Wagtail's ``{% wagtail_site %}``, routing and URL building) looks first.
+    """
+    if request is None:
+        return default_site()
+    if not hasattr(request, "_wagtail_site"):
+        hostname = split_domain_port(request._get_raw_host())[0]
+        site = _match(_sites(), hostname, int(request.get_port()))
+        request._wagtail_site = copy.copy(site) if site is not None else None
+    return request._wagtail_site
@@ -0,0 +1,25 @@
+"""Helpers for walking StreamField values."""
+from __future__ import annotations
+
+from typing import Iterator
+
+from wagtail.blocks import StreamValue, StructValue
+from wagtail.blocks.list_block import ListValue
+
+
+def iter_block_values(value) -> Iterator:
+    """
+    Every leaf value inside a stream, struct or list block value (chosen
+    pages and images, RichText, strings..), depth first.
+    """
+    if isinstance(value, StreamValue.StreamChild):
+        value = value.value
+    if isinstance(value, StructValue):
+        children = value.values()
+    elif isinstance(value, (StreamValue, ListValue)):
+        children = value
+    else:
+        yield value
+        return
+    for child in children:
+        yield from iter_block_values(child)
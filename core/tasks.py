@@ -0,0 +1,25 @@
+# core/tasks.py
+from __future__ import annotations
+
+from django_tasks import task
+
+from .edge import invalidate
+from .sitemap import update_sitemap
+
+
+@task()
+def update_sitemap_task(page_ids: list[int]) -> None:
+    """
+    Refresh the sitemap entries for ``page_ids`` and rewrite the stored
+    sitemap files. An empty list just rewrites the files (after a delete).
+    """
+    update_sitemap(page_ids)
+
+
+@task()
+def purge_edge_cache_task(keys: list[str]) -> None:
+    """
+    Drop cached fragments and CDN copies built from ``keys`` (see
+    core.edge.invalidate).
+    """
+    invalidate(keys)
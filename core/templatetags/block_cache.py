@@ -0,0 +1,107 @@
+import hashlib
+import json
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model
+from django.utils.translation import get_language
+
+from core.cache import cache_is_shared
+from core.dependencies import instance_key, record, register_cached, tracking
+from core.streamfield import iter_block_values
+
+register = template.Library()
+
+
+def _instance_keys(block) -> set[str]:
+    """Keys of the pages, images and snippets chosen inside a block."""
+    return {
+        key
+        for value in iter_block_values(block)
+        if isinstance(value, Model) and (key := instance_key(value))
+    }
+
+
+def block_version(block) -> str:
+    """
+    Hash of the block as stored in the page revision: unchanged blocks keep
+    it from one publish to the next, an edited block gets a new one.
+    """
+    stored = json.dumps(block.get_prep_value(), cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha1(stored.encode()).hexdigest()
+
+
+class BlockCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, block, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.block = block
+        self.vary_on = vary_on
+
+    def render(self, context):
+        block = self.block.resolve(context)
+        if not getattr(block, "id", None) or not cache_is_shared():
+            # Saved before block ids existed (nothing stable to key on), or
+            # other workers would not see the fragment dropped
+            record(*_instance_keys(block))
+            return self.nodelist.render(context)
+
+        key = make_template_fragment_key(
+            f"block.{self.fragment_name}",
+            [block.id, block_version(block), get_language()]
+            + [var.resolve(context) for var in self.vary_on],
+        )
+        cached = cache.get(key)
+        if cached is None:
+            # What the block chose (pages, images, snippets) and rendered is
+            # tracked apart from the page, so publishing the page doesn't drop
+            # its unchanged blocks.
+            with tracking(inherit=False) as keys:
+                record(*_instance_keys(block))
+                html = self.nodelist.render(context)
+            register_cached(key, keys)
+            cached = html, sorted(keys)
+            ttl = getattr(settings, "BLOCK_CACHE_TTL", 60 * 60 * 24)
+            cache.set(key, cached, ttl)
+        html, keys = cached
+        record(*keys)
+        return html
+
+
+@register.tag("blockcache")
+def do_blockcache(parser, token):
+    """
+    Cache the rendering of one StreamField block, keyed by the block's id
+    and its content in the published revision: after a publish only the
+    edited blocks render again.
+
+    Usage::
+
+        {% load block_cache %}
+        {% for block in page.body %}
+            {% blockcache [fragment_name] block [var1] [var2] .. %}
+                .. render the block ..
+            {% endblockcache %}
+        {% endfor %}
+
+    Anything else the block's output depends on (``forloop.counter``, ..)
+    must be passed as a vary argument. A fragment is also dropped when a
+    page, image or snippet it used is published (see core.dependencies), so
+    blocks are only cached with a shared cache (SHARED_CACHE).
+    """
+    nodelist = parser.parse(("endblockcache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "%r tag requires at least 2 arguments." % tokens[0]
+        )
+    return BlockCacheNode(
+        nodelist,
+        tokens[1],
+        parser.compile_filter(tokens[2]),
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
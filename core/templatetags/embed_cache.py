@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.embeds import embed_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_embed(url, max_width=None):
+    """
+    Wagtail's ``{% embed url max_width %}``, with the embed's HTML served
+    from the cache (core.embeds).
+    """
+    return mark_safe(embed_html(url, max_width))
@@ -0,0 +1,30 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.functional import Promise
+from wagtail.rich_text import RichText
+
+from core.rich_text import expand
+
+register = template.Library()
+
+
+@register.filter
+def cached_richtext(value):
+    """
+    Wagtail's ``|richtext``, with the expanded HTML served from the cache
+    (core.rich_text).
+    """
+    if isinstance(value, RichText):
+        value = value.source
+    elif value is None:
+        value = ""
+    elif isinstance(value, Promise):
+        value = str(value)
+    if not isinstance(value, str):
+        raise TypeError(
+            "'cached_richtext' template filter received an invalid value; "
+            "expected string, got {}.".format(type(value))
+        )
+    return render_to_string(
+        "wagtailcore/shared/richtext.html", {"html": expand(value)}
+    )
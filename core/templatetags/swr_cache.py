@@ -0,0 +1,95 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import cache_is_shared, get_or_set_stale
+from core.dependencies import record, register_cached, tracking
+
+register = template.Library()
+
+
+class StaleCacheNode(template.Node):
+    def __init__(self, nodelist, soft_ttl, fragment_name, vary_on, hard_ttl):
+        self.nodelist = nodelist
+        self.soft_ttl = soft_ttl
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.hard_ttl = hard_ttl
+
+    def render(self, context):
+        soft_ttl = int(self.soft_ttl.resolve(context))
+        hard_ttl = self.hard_ttl.resolve(context) if self.hard_ttl else None
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(f"swr.{self.fragment_name}", vary_on)
+        shared = cache_is_shared()
+
+        def render_fragment():
+            with tracking() as keys:
+                html = self.nodelist.render(context)
+            if shared:
+                # Dropped as soon as anything it used is published
+                register_cached(key, keys)
+            return html, sorted(keys)
+
+        if shared:
+            html, keys = get_or_set_stale(
+                key,
+                render_fragment,
+                soft_ttl=soft_ttl,
+                hard_ttl=int(hard_ttl) if hard_ttl is not None else None,
+            )
+        else:
+            # Other workers would not see the fragment dropped on publish:
+            # keep it in this process briefly, like a plain {% cache %}
+            ttl = min(soft_ttl, getattr(settings, "SWR_CACHE_LOCAL_TTL", 60))
+            local_key = f"{key}:local"
+            entry = cache.get(local_key) if ttl > 0 else None
+            if entry is None:
+                entry = render_fragment()
+                if ttl > 0:
+                    cache.set(local_key, entry, ttl)
+            html, keys = entry
+        # A cache hit still depends on what the fragment used
+        record(*keys)
+        return html
+
+
+@register.tag("swrcache")
+def do_swrcache(parser, token):
+    """
+    Like ``{% cache %}``, but an expired fragment keeps being served while a
+    single request re-renders it (see core.cache.get_or_set_stale).
+
+    Usage::
+
+        {% load swr_cache %}
+        {% swrcache [soft_ttl] [fragment_name] [var1] [var2] .. [hard=seconds] %}
+            .. some expensive processing ..
+        {% endswrcache %}
+
+    ``hard`` is how long the fragment may be kept at all; it defaults to
+    ``soft_ttl + SWR_CACHE_STALE_TTL``. The fragment is also dropped when a
+    page, image or snippet it used is published (see core.dependencies).
+    Without a shared cache (SHARED_CACHE) that would only reach one worker,
+    so each process keeps the fragment for at most SWR_CACHE_LOCAL_TTL
+    seconds instead.
+    """
+    nodelist = parser.parse(("endswrcache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "%r tag requires at least 2 arguments." % tokens[0]
+        )
+    hard_ttl = None
+    if len(tokens) > 3 and tokens[-1].startswith("hard="):
+        hard_ttl = parser.compile_filter(tokens[-1].removeprefix("hard="))
+        tokens = tokens[:-1]
+    return StaleCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        hard_ttl,
+    )
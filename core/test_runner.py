@@ -0,0 +1,30 @@
+# core/test_runner.py
+from __future__ import annotations
+
+from tempfile import TemporaryDirectory
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Django's runner, with the metrics the tests' requests record
+    (core.metrics) kept in a temporary METRICS_DIR for the run instead of
+    the one a local server reports from.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = TemporaryDirectory()
+        self.metrics_settings = override_settings(METRICS_DIR=self.metrics_dir.name)
+        self.metrics_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Written here now rather than by atexit, once the directory is gone
+        metrics.flush()
+        self.metrics_settings.disable()
+        self.metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
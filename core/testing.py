@@ -0,0 +1,239 @@
+# core/testing.py
+"""Shared fixtures for the page-serving tests."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.embeds.models import Embed
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+
+from behind_scenes.models import BTS_CATEGORIES, BTSIndexPage, BTSPage
+from communication.models import CommunicationPage
+from home.models import HomePage
+from journalism.models import (
+    AudioItem,
+    AudioPage,
+    VideoItem,
+    VideoPage,
+    WrittenArticleItem,
+    WrittenPage,
+)
+
+
+def publish(page):
+    page.save_revision().publish()
+    page.refresh_from_db()
+    return page
+
+
+def build_site() -> SimpleNamespace:
+    """
+    One published page of every content type, under the HomePage created
+    by home's initial migration (the default Site's root).
+    """
+    home = publish(HomePage.objects.get(slug="home"))
+
+    def add(parent, page):
+        return publish(parent.add_child(instance=page))
+
+    written = add(home, WrittenPage(title="Written", slug="written-page"))
+    video = add(home, VideoPage(title="Video", slug="video-page"))
+    audio = add(home, AudioPage(title="Audio", slug="audio-page"))
+    communication = add(
+        home, CommunicationPage(title="Communication", slug="communication")
+    )
+    bts_index = add(
+        home, BTSIndexPage(title="Behind the Scenes", slug="behind-the-scenes")
+    )
+    bts = add(
+        bts_index, BTSPage(title="Making of", slug="making-of", category="written")
+    )
+
+    return SimpleNamespace(
+        home=home,
+        written=written,
+        video=video,
+        audio=audio,
+        communication=communication,
+        bts_index=bts_index,
+        bts=bts,
+    )
+
+
+def _images(count: int) -> list:
+    """Test images; the caller points MEDIA_ROOT somewhere disposable."""
+    return [
+        get_image_model().objects.create(
+            title=f"Image {number}", file=get_test_image_file()
+        )
+        for number in range(count)
+    ]
+
+
+def _embed(url: str) -> str:
+    """An oEmbed response already stored, as if fetched: renders offline."""
+    Embed.objects.create(
+        url=url,
+        hash=get_embed_hash(url),
+        type="video",
+        html=f'<iframe src="{url}" width="640" height="360"></iframe>',
+        width=640,
+        height=360,
+    )
+    return url
+
+
+def build_large_site(items: int = 24) -> SimpleNamespace:
+    """
+    build_site(), filled the way a live site is: ``items`` articles, videos
+    and audio items, BTS pages, home and communication blocks, each with
+    images, page links and (stored) embeds where the page has them.
+
+    Query counts rendering these pages mustn't grow with ``items``.
+    """
+    site = build_site()
+    images = _images(items)
+
+    def image(number):
+        return images[number % len(images)]
+
+    def link(number):
+        page = site.bts if number % 2 else site.written
+        return f'<a linktype="page" id="{page.pk}">related page {number}</a>'
+
+    home = site.home
+    home.intro_text = f"<p>Welcome, see the {link(0)}.</p>"
+    home.about_image = image(0)
+    home.services = [
+        (
+            "service",
+            {
+                "image": image(number),
+                "title": f"Service {number}",
+                "description": "What this service is.",
+                "link_page": site.communication,
+            },
+        )
+        for number in range(items)
+    ]
+    home.reviews = [
+        (
+            "review",
+            {
+                "name": f"Client {number}",
+                "quote": "Great work.",
+                "image": image(number),
+            },
+        )
+        for number in range(items)
+    ]
+    home.about = [
+        ("about_item", {"title": f"About {number}", "body": f"<p>{link(number)}</p>"})
+        for number in range(items)
+    ]
+    site.home = publish(home)
+
+    site.written.articles = [
+        WrittenArticleItem(
+            title=f"Article {number}",
+            publication_name="The Paper",
+            publication_date=date(2020, 1, 1) + timedelta(days=number),
+            external_url=f"https://example.com/articles/{number}",
+            excerpt="An excerpt.",
+        )
+        for number in range(items)
+    ]
+    site.written = publish(site.written)
+
+    site.video.videos = [
+        VideoItem(
+            video_date=date(2020, 1, 1) + timedelta(days=number),
+            standfirst=f"Video {number}",
+            description=f"<p>{link(number)}</p>",
+            embed_url=_embed(f"https://www.youtube.com/watch?v=video{number}"),
+        )
+        for number in range(items)
+    ]
+    site.video = publish(site.video)
+
+    site.audio.audios = [
+        AudioItem(
+            title=f"Audio {number}",
+            audio_date=date(2020, 1, 1) + timedelta(days=number),
+            description=f"<p>{link(number)}</p>",
+            embed_url=_embed(f"https://soundcloud.com/someone/audio-{number}"),
+        )
+        for number in range(items)
+    ]
+    site.audio = publish(site.audio)
+
+    communication = site.communication
+    communication.services = [
+        (
+            "service",
+            {
+                "title": f"Service {number}",
+                "details": f"<p>{link(number)}</p>",
+                "offering": "<ul><li>One</li><li>Two</li></ul>",
+                "image": image(number),
+                "example": f"<p>{link(number + 1)}</p>",
+                "output": "<p>Results.</p>",
+            },
+        )
+        for number in range(items)
+    ]
+    communication.instagram_reels = [
+        (
+            "instagram_card",
+            {
+                "url": f"https://www.instagram.com/p/post{number}/",
+                "preview_image": image(number),
+                "title": f"Post {number}",
+            },
+        )
+        for number in range(items)
+    ]
+    site.communication = publish(communication)
+
+    categories = [value for value, _ in BTS_CATEGORIES]
+    site.bts_pages = [
+        publish(
+            site.bts_index.add_child(
+                instance=BTSPage(
+                    title=f"BTS {number}",
+                    slug=f"bts-{number}",
+                    category=categories[number % len(categories)],
+                    teaser_image=image(number),
+                    intro_body=f"<p>{link(number)}</p>",
+                )
+            )
+        )
+        for number in range(items)
+    ]
+
+    bts = site.bts
+    bts.teaser_image = image(0)
+    bts.body = [
+        block
+        for number in range(items)
+        for block in (
+            ("paragraph", f"<p>{link(number)}</p>"),
+            ("image", {"image": image(number), "caption": f"Caption {number}"}),
+        )
+    ] + [
+        ("embed", _embed("https://vimeo.com/123456")),
+        (
+            "gallery",
+            {
+                "items": [
+                    {"image": image(number), "caption": f"Gallery {number}"}
+                    for number in range(items)
+                ]
+            },
+        ),
+    ]
+    site.bts = publish(bts)
+    return site
@@ -0,0 +1,1086 @@
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import time
+from contextlib import ExitStack
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from wagtail import rich_text
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, PageViewRestriction, Site
+
+from behind_scenes.models import BTSPage
+from miriamgradel.middlewares import compression
+from miriamgradel.middlewares.replica_reads import PIN_COOKIE, ReplicaReadsMiddleware
+from miriamgradel.middlewares.server_timing import ServerTimingMiddleware
+from work_with_me.models import WorkWithMePage
+
+from . import metrics
+from .cache import get_or_set_stale
+from .db_routers import (
+    ReplicaRouter,
+    available_replica,
+    primary_pinned,
+    reading_from,
+)
+from .dependencies import invalidate_cached, page_dependency_keys, tracking
+from .embeds import embed_html
+from .models import PageDependency
+from .rich_text import expand, expand_many, rendering
+from .templatetags import block_cache
+from .purge import LocalPurgeBackend
+from .routing import warm_routes
+from .sitemap import rebuild_sitemap
+from .sites import default_site, site_for_request
+from .testing import build_large_site, build_site, publish
+from .timing import collecting
+
+PAGE_NAMES = (
+    "home",
+    "written",
+    "video",
+    "audio",
+    "communication",
+    "bts_index",
+    "bts",
+)
+
+
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def get(self, path="/sitemap.xml", **headers):
+        return self.client.get(path, headers=headers)
+
+    def locations(self, path="/sitemap.xml"):
+        return re.findall(r"<loc>(.*?)</loc>", self.get(path).content.decode())
+
+    def test_live_pages_are_listed(self):
+        self.assertCountEqual(
+            self.locations(),
+            [getattr(self.site, name).full_url for name in PAGE_NAMES],
+        )
+
+    def test_publish_adds_the_page(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            page = publish(
+                self.site.bts_index.add_child(
+                    instance=BTSPage(title="New", slug="new", category="written")
+                )
+            )
+        self.assertIn(page.full_url, self.locations())
+
+    def test_unpublish_removes_the_page(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.unpublish()
+        self.assertNotIn(self.site.bts.full_url, self.locations())
+
+    def test_private_pages_are_left_out(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts_index.view_restrictions.create(
+                restriction_type="password", password="secret"
+            )
+        locations = self.locations()
+        self.assertNotIn(self.site.bts_index.full_url, locations)
+        # Descendants are private too
+        self.assertNotIn(self.site.bts.full_url, locations)
+        self.assertIn(self.site.home.full_url, locations)
+
+    @override_settings(SITEMAP_MAX_URLS=3)
+    def test_large_sites_are_split_into_sections(self):
+        rebuild_sitemap()
+        root_url = default_site().root_url
+        self.assertEqual(
+            self.locations(),
+            [f"{root_url}/sitemap-{number}.xml" for number in (1, 2, 3)],
+        )
+        sections = [self.locations(f"/sitemap-{number}.xml") for number in (1, 2, 3)]
+        self.assertEqual([len(section) for section in sections], [3, 3, 1])
+        self.assertCountEqual(
+            sum(sections, []),
+            [getattr(self.site, name).full_url for name in PAGE_NAMES],
+        )
+        self.assertEqual(self.get("/sitemap-4.xml").status_code, 404)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_conditional_requests(self):
+        response = self.get()
+        # The sitemap row's validators; the Site comes from the registry
+        with self.assertNumQueries(1):
+            not_modified = self.get(if_modified_since=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.get(if_none_match=response["ETag"]).status_code, 304)
+
+    def test_gzip_stored_bytes(self):
+        plain = self.get()
+        compressed = self.get(accept_encoding="gzip")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def get(self, page, **headers):
+        return self.client.get(page.url, headers=headers)
+
+    def test_pages_carry_validators(self):
+        for name in PAGE_NAMES:
+            with self.subTest(page=name):
+                response = self.get(getattr(self.site, name))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header("ETag"))
+                self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_if_none_match_skips_get_context(self):
+        for name in PAGE_NAMES:
+            page = getattr(self.site, name)
+            with self.subTest(page=name):
+                etag = self.get(page)["ETag"]
+                with mock.patch.object(
+                    type(page), "get_context", side_effect=AssertionError
+                ):
+                    response = self.get(page, if_none_match=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        for name in PAGE_NAMES:
+            page = getattr(self.site, name)
+            with self.subTest(page=name):
+                last_modified = self.get(page)["Last-Modified"]
+                response = self.get(page, if_modified_since=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+    def test_publishing_the_page_changes_etag(self):
+        for name in PAGE_NAMES:
+            page = getattr(self.site, name)
+            with self.subTest(page=name):
+                etag = self.get(page)["ETag"]
+                publish(page)
+                response = self.get(page, if_none_match=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_bts_teasers_are_dependencies(self):
+        pages = [
+            self.site.written,
+            self.site.video,
+            self.site.audio,
+            self.site.communication,
+            self.site.bts_index,
+        ]
+        etags = [self.get(page)["ETag"] for page in pages]
+
+        self.site.bts_index.add_child(
+            instance=BTSPage(title="New BTS", slug="new-bts", category="audio")
+        ).save_revision().publish()
+
+        for page, etag in zip(pages, etags):
+            with self.subTest(page=page.slug):
+                self.assertEqual(self.get(page, if_none_match=etag).status_code, 200)
+
+    def test_unpublished_dependency_changes_etag(self):
+        etag = self.get(self.site.bts_index)["ETag"]
+        self.site.bts.unpublish()
+        response = self.get(self.site.bts_index, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unrelated_publish_keeps_etag(self):
+        etag = self.get(self.site.bts)["ETag"]
+        other = BTSPage(title="Other", slug="other", category="video")
+        publish(self.site.bts_index.add_child(instance=other))
+        response = self.get(self.site.bts, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_edited_image_changes_etag(self):
+        self.enterContext(
+            override_settings(MEDIA_ROOT=self.enterContext(TemporaryDirectory()))
+        )
+        image = get_image_model().objects.create(
+            title="Image", file=get_test_image_file()
+        )
+        home = self.site.home
+        home.services = [("service", {"image": image, "title": "Service"})]
+        publish(home)
+        etag = self.get(home)["ETag"]
+        self.assertEqual(self.get(home, if_none_match=etag).status_code, 304)
+
+        image.focal_point_x = 10
+        image.save()
+        response = self.get(home, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_view_restrictions_come_first(self):
+        page = self.site.bts
+        etag = self.get(page)["ETag"]
+        PageViewRestriction.objects.create(
+            page=page, restriction_type=PageViewRestriction.LOGIN
+        )
+        response = self.get(page, if_none_match=etag)
+        self.assertEqual(response.status_code, 302)
+
+    def test_editors_always_get_a_full_render(self):
+        user = get_user_model().objects.create_superuser("editor", "e@example.com")
+        self.client.force_login(user)
+        response = self.get(self.site.home)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+
+
+@override_settings(EDGE_CACHE_PURGE_BACKEND="core.purge.LocalPurgeBackend")
+class EdgeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        LocalPurgeBackend.reset()
+
+    def purged_keys(self):
+        return {key for keys in LocalPurgeBackend.purged for key in keys}
+
+    def test_page_responses_carry_lifetimes_and_keys(self):
+        response = self.client.get(self.site.written.url)
+        self.assertIn("s-maxage=", response["Cache-Control"])
+        self.assertIn("stale-while-revalidate=", response["Cache-Control"])
+        keys = response["Surrogate-Key"].split()
+        self.assertEqual(keys[0], f"page-{self.site.written.pk}")
+        # Recorded while rendering: navigation, the teasers listing
+        self.assertIn(f"page-{self.site.home.pk}", keys)
+        self.assertIn("bts-written", keys)
+
+    def test_not_modified_responses_keep_keys(self):
+        etag = self.client.get(self.site.home.url)["ETag"]
+        response = self.client.get(self.site.home.url, headers={"if_none_match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn(f"page-{self.site.home.pk}", response["Surrogate-Key"])
+
+    def test_editor_responses_are_not_shared(self):
+        user = get_user_model().objects.create_superuser("editor", "e@example.com")
+        self.client.force_login(user)
+        response = self.client.get(self.site.home.url)
+        self.assertFalse(response.has_header("Surrogate-Key"))
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+
+    def test_publish_purges_page(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.written)
+        self.assertEqual(self.purged_keys(), {f"page-{self.site.written.pk}"})
+
+    def test_bts_publish_purges_its_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        self.assertEqual(
+            self.purged_keys(), {f"page-{self.site.bts.pk}", "bts", "bts-written"}
+        )
+
+    def test_bts_category_change_purges_old_and_new_category(self):
+        self.site.bts.category = "audio"
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        self.assertTrue({"bts-written", "bts-audio"} <= self.purged_keys())
+
+    def test_unpublish_purges(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.unpublish()
+        self.assertIn(f"page-{self.site.bts.pk}", self.purged_keys())
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches[settings.COMPRESSION_CACHE_ALIAS].clear()
+
+    def test_gzip_round_trip(self):
+        plain = self.client.get(self.site.video.url)
+        response = self.client.get(
+            self.site.video.url, headers={"accept_encoding": "gzip"}
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith("W/"))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipIf(compression.brotli is None, "Brotli is not installed")
+    def test_brotli_preferred(self):
+        response = self.client.get(
+            self.site.video.url, headers={"accept_encoding": "gzip, deflate, br"}
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_published_page_is_compressed_once(self):
+        with mock.patch.object(
+            compression, "compress", wraps=compression.compress
+        ) as compress:
+            for _ in range(3):
+                self.client.get(
+                    self.site.home.url, headers={"accept_encoding": "gzip"}
+                )
+        self.assertEqual(compress.call_count, 1)
+
+    def test_csrf_token_responses_are_not_compressed(self):
+        contact = publish(
+            self.site.home.add_child(
+                instance=WorkWithMePage(title="Contact", slug="contact")
+            )
+        )
+        response = self.client.get(contact.url, headers={"accept_encoding": "gzip"})
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION_MIN_LENGTH=10**6)
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(
+            self.site.home.url, headers={"accept_encoding": "gzip"}
+        )
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_fresh_value_is_reused(self):
+        self.assertEqual(get_or_set_stale("k", self.compute, soft_ttl=60), 1)
+        self.assertEqual(get_or_set_stale("k", self.compute, soft_ttl=60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_refreshed_by_one_request(self):
+        # soft_ttl=0: stale as soon as it is stored
+        get_or_set_stale("k", self.compute, soft_ttl=0, hard_ttl=60)
+        self.assertEqual(get_or_set_stale("k", self.compute, soft_ttl=0), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_value_served_while_locked(self):
+        get_or_set_stale("k", self.compute, soft_ttl=0, hard_ttl=60)
+        caches["default"].add("k:lock", 1)
+        self.assertEqual(get_or_set_stale("k", self.compute, soft_ttl=0), 1)
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(SWR_CACHE_LOCK_WAIT=0.1)
+    def test_cold_miss_computes_after_waiting_for_lock(self):
+        caches["default"].add("k:lock", 1)
+        self.assertEqual(get_or_set_stale("k", self.compute, soft_ttl=60), 1)
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load swr_cache %}{% swrcache 60 "frag" name hard=120 %}'
+            "{{ name }}{% endswrcache %}"
+        )
+        self.assertEqual(template.render(Context({"name": "a"})), "a")
+        self.assertEqual(template.render(Context({"name": "b"})), "b")
+
+
+@override_settings(
+    EDGE_CACHE_PURGE_BACKEND="core.purge.LocalPurgeBackend", SHARED_CACHE=True
+)
+class DependencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_loaded_instances_are_recorded(self):
+        with tracking() as keys:
+            Page.objects.get(pk=self.site.home.pk)
+        self.assertEqual(keys, {f"page-{self.site.home.pk}"})
+
+    def test_nested_tracking_reports_to_parent(self):
+        with tracking() as outer:
+            with tracking() as inner:
+                Page.objects.get(pk=self.site.home.pk)
+        self.assertEqual(inner, outer)
+
+    def test_render_saves_dependencies(self):
+        self.client.get(self.site.written.url)
+        keys = page_dependency_keys(self.site.written.pk)
+        self.assertIn(f"page-{self.site.home.pk}", keys)
+        self.assertIn("bts-written", keys)
+        self.assertNotIn(f"page-{self.site.written.pk}", keys)
+
+    def test_editor_renders_are_not_saved(self):
+        user = get_user_model().objects.create_superuser("editor", "e@example.com")
+        self.client.force_login(user)
+        self.client.get(self.site.written.url)
+        self.assertFalse(PageDependency.objects.exists())
+
+    def test_fragment_dropped_when_a_dependency_is_invalidated(self):
+        template = Template(
+            '{% load swr_cache %}{% swrcache 60 "frag" %}'
+            "{{ page.title }}{% endswrcache %}"
+        )
+
+        def render():
+            # As in a page render: the context is loaded inside tracking()
+            with tracking():
+                page = Page.objects.get(pk=self.site.bts.pk)
+                return template.render(Context({"page": page}))
+
+        self.assertEqual(render(), "Making of")
+        Page.objects.filter(pk=self.site.bts.pk).update(title="Renamed")
+        self.assertEqual(render(), "Making of")
+        invalidate_cached([f"page-{self.site.video.pk}"])
+        self.assertEqual(render(), "Making of")
+        invalidate_cached([f"page-{self.site.bts.pk}"])
+        self.assertEqual(render(), "Renamed")
+
+    @override_settings(SHARED_CACHE=False)
+    def test_fragments_kept_briefly_without_a_shared_cache(self):
+        template = Template(
+            '{% load swr_cache %}{% swrcache 60 "frag" %}'
+            "{{ title }}{% endswrcache %}"
+        )
+        self.assertEqual(template.render(Context({"title": "a"})), "a")
+        self.assertEqual(template.render(Context({"title": "b"})), "a")
+        with override_settings(SWR_CACHE_LOCAL_TTL=0):
+            self.assertEqual(template.render(Context({"title": "b"})), "b")
+
+
+@override_settings(SHARED_CACHE=True)
+class BlockCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+        cls.site.bts.body = [
+            ("paragraph", rich_text.RichText("<p>One</p>")),
+            ("paragraph", rich_text.RichText("<p>Two</p>")),
+        ]
+        publish(cls.site.bts)
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def rendered_blocks(self):
+        # Only a cache miss looks for the block's dependencies
+        with mock.patch.object(
+            block_cache, "_instance_keys", wraps=block_cache._instance_keys
+        ) as render:
+            response = self.client.get(self.site.bts.url)
+        return response, render.call_count
+
+    def test_unchanged_blocks_come_from_cache(self):
+        self.assertEqual(self.rendered_blocks()[1], 2)
+        self.assertEqual(self.rendered_blocks()[1], 0)
+
+    def test_publish_renders_only_edited_blocks(self):
+        self.rendered_blocks()
+        page = self.site.bts
+        page.body[1].value = rich_text.RichText("<p>Edited</p>")
+        publish(page)
+        response, rendered = self.rendered_blocks()
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, "<p>One</p>")
+        self.assertContains(response, "<p>Edited</p>")
+
+    @override_settings(SHARED_CACHE=False)
+    def test_blocks_need_a_shared_cache(self):
+        self.assertEqual(self.rendered_blocks()[1], 2)
+        response, rendered = self.rendered_blocks()
+        self.assertEqual(rendered, 2)
+        self.assertContains(response, "<p>Two</p>")
+
+
+@override_settings(SHARED_CACHE=True)
+class RichTextCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def link(self, page):
+        return f'<p><a linktype="page" id="{page.pk}">{page.title}</a></p>'
+
+    def queries(self, sources):
+        caches["default"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            expand_many(sources)
+        return len(queries)
+
+    def test_links_resolved_in_one_pass(self):
+        sources = [self.link(self.site.written) + str(n) for n in range(5)]
+        self.assertEqual(self.queries(sources), self.queries(sources[:1]))
+
+    def test_expansions_are_cached(self):
+        source = self.link(self.site.written)
+        self.assertIn(f'href="{self.site.written.url}"', expand(source))
+        with self.assertNumQueries(0):
+            expand(source)
+
+    def test_moved_link_target_drops_entry(self):
+        source = self.link(self.site.bts)
+        self.assertIn(self.site.bts.url, expand(source))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.move(self.site.home, pos="last-child")
+        self.assertIn("/making-of/", expand(source))
+        self.assertNotIn("behind-the-scenes", expand(source))
+
+    def test_filter_renders_like_wagtails(self):
+        template = Template(
+            "{% load wagtailcore_tags rich_text_cache %}"
+            "{{ source|richtext }}|{{ source|cached_richtext }}"
+        )
+        source = self.link(self.site.written)
+        wagtail_html, cached_html = template.render(
+            Context({"source": source})
+        ).split("|")
+        self.assertEqual(wagtail_html, cached_html)
+        self.assertIn(f'href="{self.site.written.url}"', cached_html)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_kept_for_one_render_without_a_shared_cache(self):
+        source = self.link(self.site.written)
+        expand(source)
+        self.assertTrue(self.queries([source]))
+        with rendering():
+            expand(source)
+            with self.assertNumQueries(0):
+                expand(source)
+
+
+class RouteCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def queries(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_known_route_skips_tree_walk(self):
+        url = self.site.bts.url
+        first = self.queries(url)
+        self.assertLess(self.queries(url), first)
+
+    def test_warmed_routes(self):
+        self.assertEqual(warm_routes(), len(PAGE_NAMES))
+        with mock.patch.object(Page, "route", side_effect=AssertionError):
+            # Warmed under the Site's own hostname
+            self.queries(self.site.bts.url, host="localhost")
+
+    def test_warming_needs_a_shared_cache(self):
+        stdout = StringIO()
+        with mock.patch("core.routing.cache.set_many") as set_many:
+            call_command("warm_route_cache", stdout=stdout)
+        set_many.assert_not_called()
+        with override_settings(SHARED_CACHE=True):
+            call_command("warm_route_cache", stdout=stdout)
+        self.assertIn(f"Cached {len(PAGE_NAMES)} page routes.", stdout.getvalue())
+
+    def test_moved_page_is_routed_again(self):
+        old_url = self.site.bts.url
+        self.client.get(old_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.move(self.site.home, pos="last-child")
+        new_url = Page.objects.get(pk=self.site.bts.pk).url
+        # Wagtail's redirect from the old path, not the cached route
+        self.assertRedirects(self.client.get(old_url), new_url, status_code=301)
+        self.queries(new_url)
+
+    def test_route_moved_in_another_worker_is_not_served(self):
+        url = self.site.bts.url
+        self.client.get(url)
+        # As in another worker: the on-commit invalidation never runs here
+        self.site.bts.move(self.site.home, pos="last-child")
+        self.assertNotEqual(self.client.get(url).status_code, 200)
+
+    def test_unpublished_page_is_not_served(self):
+        url = self.site.bts.url
+        self.client.get(url)
+        self.site.bts.unpublish()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class SiteRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+        # Rolled back Site edits send no signal
+        self.addCleanup(caches["default"].clear)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_request_site_without_queries(self):
+        default_site()
+        request = RequestFactory().get("/", HTTP_HOST="localhost")
+        with self.assertNumQueries(0):
+            site = site_for_request(request)
+            self.assertIs(Site.find_for_request(request), site)
+        self.assertTrue(site.is_default_site)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_saving_a_site_reloads_the_registry(self):
+        default_site()
+        site = Site.objects.get(is_default_site=True)
+        site.hostname = "miriamgradel.cc"
+        site.port = 443
+        with self.captureOnCommitCallbacks(execute=True):
+            site.save()
+        self.assertEqual(default_site().root_url, "https://miriamgradel.cc")
+
+    def test_site_changes_without_a_shared_cache(self):
+        default_site()
+        # As in another worker: no invalidation reaches this process
+        Site.objects.filter(is_default_site=True).update(hostname="example.com")
+        self.assertEqual(default_site().hostname, "example.com")
+        request = RequestFactory().get("/", HTTP_HOST="example.com")
+        with self.assertNumQueries(1):
+            site_for_request(request)
+            site_for_request(request)
+
+    def test_base_html_absolute_urls(self):
+        content = self.client.get(self.site.bts.url).content.decode()
+        self.assertIn('"url": "http://localhost"', content)
+        self.assertIn(
+            f'<link rel="canonical" href="http://localhost{self.site.bts.url}">',
+            content,
+        )
+
+
+class ConnectionReuseTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_connections_are_reused_and_checked(self):
+        database = settings.DATABASES["default"]
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        if "pool" in database["OPTIONS"]:
+            self.assertEqual(database["CONN_MAX_AGE"], 0)
+        else:
+            self.assertGreater(database["CONN_MAX_AGE"], 0)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_db_connections", requests=5, stdout=out)
+        self.assertIn("Connection overhead per request", out.getvalue())
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def get(self, url):
+        with self.assertLogs("miriamgradel.timing") as logs:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(logs.records[0].getMessage())
+
+    def test_page_phases(self):
+        caches["default"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response, line = self.get(self.site.bts.url)
+        self.assertEqual(
+            set(line["phases"]), {"db", "cache", "view", "render", "total"}
+        )
+        # Savepoints don't go through execute wrappers
+        count = sum("SAVEPOINT" not in query["sql"] for query in queries)
+        self.assertEqual(line["page_type"], "BTSPage")
+        self.assertEqual(line["phases"]["db"]["count"], count)
+        self.assertGreater(line["cache_misses"], 0)
+        # Cached by the CDN: the header would be replayed to everyone
+        self.assertIn("s-maxage", response["Cache-Control"])
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_header_on_uncached_responses(self):
+        user = get_user_model().objects.create_superuser("editor", "", "pw")
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = self.get(self.site.bts.url)
+        count = sum("SAVEPOINT" not in query["sql"] for query in queries)
+        phases = dict(
+            entry.split(";", 1) for entry in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(set(phases), {"db", "cache", "view", "render", "total"})
+        self.assertIn(f'desc="{count} queries"', phases["db"])
+
+    def test_generated_renditions_are_counted(self):
+        self.enterContext(
+            override_settings(MEDIA_ROOT=self.enterContext(TemporaryDirectory()))
+        )
+        image = get_image_model().objects.create(
+            title="Image", file=get_test_image_file()
+        )
+        with collecting() as timings:
+            image.get_rendition("fill-10x10")
+            image.get_rendition("fill-10x10")
+        self.assertEqual(timings.phases["rendition"].count, 1)
+        self.assertGreater(timings.phases["rendition"].duration, 0)
+        header = ServerTimingMiddleware(None).header(timings)
+        self.assertRegex(header, r'rendition;dur=[\d.]+;desc="1 generated"')
+
+    def test_embed_fetches_are_timed(self):
+        def find_embed(url, max_width=None, max_height=None):
+            time.sleep(0.01)
+            return {
+                "html": "<iframe></iframe>",
+                "type": "video",
+                "width": 640,
+                "height": 360,
+            }
+
+        finder = mock.Mock(find_embed=find_embed)
+        with collecting() as timings, mock.patch(
+            "wagtail.embeds.embeds.get_finders", return_value=[finder]
+        ):
+            self.assertEqual(embed_html("https://example.com/v"), "<iframe></iframe>")
+        self.assertEqual(timings.phases["embed"].count, 1)
+        self.assertGreaterEqual(timings.phases["embed"].duration, 0.01)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests(self):
+        response = self.client.get(self.site.bts.url)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        metrics._pending.clear()
+        directory = self.enterContext(TemporaryDirectory())
+        self.enterContext(override_settings(METRICS_DIR=directory))
+
+    def scrape(self) -> dict[str, float]:
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        return dict(
+            line.rsplit(" ", 1) for line in lines if not line.startswith("#")
+        )
+
+    def test_page_requests(self):
+        caches["default"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.site.bts.url)
+        # Savepoints don't go through execute wrappers
+        count = sum("SAVEPOINT" not in query["sql"] for query in queries)
+        samples = self.scrape()
+        labels = 'page_type="BTSPage",view="wagtail_serve"'
+        self.assertEqual(
+            samples[f"http_request_duration_seconds_count{{{labels}}}"], "1"
+        )
+        self.assertEqual(
+            samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], "1"
+        )
+        self.assertEqual(samples[f"db_queries_total{{{labels}}}"], str(count))
+        self.assertIn('cache_requests_total{cache="default",result="miss"}', samples)
+
+    def test_generation_counts(self):
+        contact = self.site.home.add_child(
+            instance=WorkWithMePage(title="Contact", slug="contact")
+        )
+        url = reverse("work_with_me:vcard_inline", args=[contact.pk])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.scrape()['generated_total{kind="vcard"}'], "2")
+
+    def test_shared_across_processes(self):
+        def worker():
+            metrics.inc("generated_total", kind="qr")
+            metrics.flush()
+
+        metrics.inc("generated_total", kind="qr")
+        process = multiprocessing.get_context("fork").Process(target=worker)
+        process.start()
+        process.join()
+        self.assertEqual(self.scrape()['generated_total{kind="qr"}'], "2")
+
+    def test_remote_scrapers_are_refused(self):
+        response = self.client.get("/metrics", REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, 404)
+
+
+@skipIf(connection.vendor != "sqlite", "SQLite mode only")
+class SQLiteModeTests(SimpleTestCase):
+    databases = {"default"}
+
+    def pragma(self, database, name):
+        with database.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        # WAL and mmap don't apply to the in-memory test database: connect
+        # to a file with the same settings
+        directory = self.enterContext(TemporaryDirectory())
+        default = connections["default"]
+        database = default.__class__(
+            {**default.settings_dict, "NAME": f"{directory}/db.sqlite3"}
+        )
+        self.addCleanup(database.close)
+        self.assertEqual(self.pragma(database, "journal_mode"), "wal")
+        self.assertEqual(
+            self.pragma(database, "mmap_size"), settings.SQLITE_MMAP_SIZE
+        )
+        self.assertEqual(self.pragma(database, "synchronous"), 1)  # NORMAL
+        self.assertEqual(
+            self.pragma(database, "busy_timeout"),
+            1000 * settings.SQLITE_BUSY_TIMEOUT,
+        )
+
+    def test_write_transactions_start_immediate(self):
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+@override_settings(REPLICA_DATABASES=["replica_1", "replica_2"])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_follow_the_request(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Page))
+        with reading_from("replica_1") as reads:
+            self.assertEqual(router.db_for_read(Page), "replica_1")
+            self.assertEqual(router.db_for_write(Page), "default")
+            # Read what was just written
+            self.assertIsNone(router.db_for_read(Page))
+        self.assertTrue(reads.wrote)
+
+    def test_failing_replica_is_skipped(self):
+        down = mock.Mock(**{"ensure_connection.side_effect": OperationalError})
+        up = mock.Mock()
+        with mock.patch(
+            "core.db_routers.connections", {"replica_1": down, "replica_2": up}
+        ), mock.patch("core.db_routers._unavailable", {}), mock.patch(
+            "core.db_routers.random"  # no shuffling: replica_1 is tried first
+        ):
+            for _ in range(5):
+                self.assertEqual(available_replica(), "replica_2")
+        # Retried only after DB_REPLICA_RETRY_SECONDS
+        self.assertEqual(down.ensure_connection.call_count, 1)
+
+    def test_replicas_never_migrate(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate("default", "core"))
+        self.assertFalse(router.allow_migrate("replica_1", "core"))
+
+
+@override_settings(REPLICA_DATABASES=["replica_1"], SHARED_CACHE=True)
+class ReplicaReadsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+        # Serves every read from the primary: routers only see the choice
+        self.available_replica = self.enterContext(
+            mock.patch(
+                "miriamgradel.middlewares.replica_reads.available_replica",
+                return_value=None,
+            )
+        )
+
+    def test_anonymous_page_reads_use_a_replica(self):
+        self.client.get(self.site.bts.url)
+        self.available_replica.assert_called_once()
+
+    def test_primary_reads(self):
+        cases = {
+            "editor": lambda: self.client.force_login(
+                get_user_model().objects.create_superuser("editor", "", "pw")
+            ),
+            "session wrote": lambda: self.client.cookies.load({PIN_COOKIE: "1"}),
+        }
+        for name, setup in cases.items():
+            with self.subTest(name):
+                self.client = self.client_class()
+                setup()
+                self.client.get(self.site.bts.url)
+                self.available_replica.assert_not_called()
+
+    def test_content_change_pins_everyone_to_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        self.assertTrue(primary_pinned())
+        self.client.get(self.site.bts.url)
+        self.available_replica.assert_not_called()
+
+    def test_writes_pin_the_session(self):
+        def view(request):
+            ReplicaRouter().db_for_write(Page)
+            return HttpResponse()
+
+        middleware = ReplicaReadsMiddleware(view)
+        response = middleware(RequestFactory().post("/"))
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+        # Bookkeeping writes on a GET don't pin
+        response = middleware(RequestFactory().get("/"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_replicas_need_a_shared_cache(self):
+        self.client.get(self.site.bts.url)
+        self.available_replica.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        # Other workers could not see the pin
+        self.assertFalse(primary_pinned())
+
+
+@override_settings(
+    REPLICA_DATABASES=["replica"],
+    DATABASE_ROUTERS=["core.db_routers.ReplicaRouter"],
+    SHARED_CACHE=True,
+)
+class ReplicaDatabaseTests(TestCase):
+    """
+    A second wrapper around the test database connection stands in for a
+    replica: it sees the test's data, and logs the queries routed to it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        caches["default"].clear()
+        default = connections["default"]
+        replica = default.__class__(default.settings_dict, alias="replica")
+        replica.connection = default.connection
+        connections["replica"] = replica
+        self.addCleanup(connections.__delitem__, "replica")
+        self.addCleanup(setattr, replica, "connection", None)
+
+    def replica_queries(self, *patches) -> int:
+        replica = connections["replica"]
+        with CaptureQueriesContext(replica) as queries, ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            response = self.client.get(self.site.bts.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_anonymous_pages_read_from_replica(self):
+        self.assertTrue(self.replica_queries())
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        down = mock.patch.object(
+            connections["replica"], "ensure_connection", side_effect=OperationalError
+        )
+        unavailable = mock.patch("core.db_routers._unavailable", {})
+        self.assertEqual(self.replica_queries(down, unavailable), 0)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Cold renders (every cache empty, renditions and embeds already stored)
+    of a filled-in site (core.testing.build_large_site) stay within a query
+    budget per page type. With ``items`` rows in every list, an N+1 in a
+    get_context, a teaser tag or StreamField images breaks it.
+
+    Render times depend on the machine, so their budgets are only a loose
+    check: multiplied by QUERY_BUDGET_TIME_FACTOR (5 by default), or not
+    checked at all with 0.
+    """
+
+    items = 24
+    time_factor = float(os.getenv("QUERY_BUDGET_TIME_FACTOR", "5"))
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = cls.enterClassContext(TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_large_site(cls.items)
+
+    def assertWithinBudget(self, page, queries: int, seconds: float):
+        # Generate the renditions a live site would already have
+        self.assertEqual(self.client.get(page.url).status_code, 200)
+        for cache in caches.all():
+            cache.clear()
+
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = self.client.get(page.url)
+            duration = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200)
+        executed = [
+            query["sql"] for query in captured if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertLessEqual(
+            len(executed),
+            queries,
+            f"{type(page).__name__} ran {len(executed)} queries:\n"
+            + "\n".join(executed),
+        )
+        if self.time_factor:
+            self.assertLess(
+                duration,
+                seconds * self.time_factor,
+                f"{type(page).__name__} took {duration:.3f}s",
+            )
+        return response
+
+    def test_home_page(self):
+        self.assertWithinBudget(self.site.home, queries=40, seconds=1.0)
+
+    def test_written_page(self):
+        self.assertWithinBudget(self.site.written, queries=38, seconds=0.5)
+
+    def test_video_page(self):
+        response = self.assertWithinBudget(self.site.video, queries=41, seconds=0.5)
+        self.assertContains(response, 'src="https://www.youtube.com/watch?v=video0"')
+
+    def test_audio_page(self):
+        self.assertWithinBudget(self.site.audio, queries=43, seconds=0.5)
+
+    def test_communication_page(self):
+        self.assertWithinBudget(self.site.communication, queries=43, seconds=1.0)
+
+    def test_bts_index_page(self):
+        self.assertWithinBudget(self.site.bts_index, queries=33, seconds=0.5)
+
+    def test_bts_page(self):
+        self.assertWithinBudget(self.site.bts, queries=42, seconds=1.0)
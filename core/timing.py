@@ -0,0 +1,81 @@
+# core/timing.py
+"""
+Per-request timings.
+
+ServerTimingMiddleware collects a RequestTimings for sampled requests; the
+instrumented code adds to whichever one is current (none outside a sampled
+request, where recording is a no-op):
+
+- ``db``: every query, through a connection execute wrapper;
+- ``cache``: every cache call (core.cache_backends), with hits and misses;
+- ``view`` and ``render``: the view, and the rendering of the
+  TemplateResponse it returned (middleware hooks);
+- ``rendition`` and ``embed``: images and embeds generated or fetched
+  during the request (post_save signals, see core.signal_handlers), with
+  the time spent saving renditions and fetching embeds. That time is also
+  part of the view or render that needed them.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Phase:
+    duration: float = 0.0
+    count: int = 0
+
+
+@dataclass
+class RequestTimings:
+    phases: dict[str, Phase] = field(default_factory=dict)
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def add(self, name: str, duration: float = 0.0, count: int = 1) -> None:
+        phase = self.phases.setdefault(name, Phase())
+        phase.duration += duration
+        phase.count += count
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("timings", default=None)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def collecting():
+    """Collect the timings of everything run inside the block."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record(name: str, duration: float = 0.0, count: int = 1) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration, count)
+
+
+def record_cache(hits: int, misses: int) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper timing each query as ``db``."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record("db", time.perf_counter() - start)
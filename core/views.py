@@ -0,0 +1,73 @@
+# core/views.py
+from __future__ import annotations
+
+import gzip
+import re
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from . import metrics as process_metrics
+from .models import SitemapFile
+from .sitemap import INDEX_NAME, rebuild_sitemap, section_name
+
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+@require_safe
+def sitemap(request, section=None):
+    """
+    Serve a stored sitemap file (see core.sitemap) without touching the page
+    tree: gzipped bytes straight from the row, or inflated for clients that
+    do not accept gzip. Conditional requests are answered from the ETag and
+    Last-Modified columns alone.
+    """
+    name = section_name(section) if section else INDEX_NAME
+    files = SitemapFile.objects.defer("content")
+    sitemap_file = files.filter(name=name).first()
+    if sitemap_file is None and section is None:
+        # Nothing published since deploy and no rebuild_sitemap run yet
+        rebuild_sitemap()
+        sitemap_file = files.filter(name=name).first()
+    if sitemap_file is None:
+        raise Http404
+
+    # Weak: the gzip and identity bodies are the same document
+    etag = f'W/"{sitemap_file.etag}"'
+    last_modified = int(sitemap_file.last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content = bytes(sitemap_file.content)
+        response = HttpResponse(content_type="application/xml")
+        if _ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+            response["Content-Encoding"] = "gzip"
+        else:
+            content = gzip.decompress(content)
+        response.content = content
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "public, max-age=3600"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+@require_safe
+def metrics(request):
+    """
+    Every worker's metrics (core.metrics) for a local scraper; a 404 for
+    addresses outside METRICS_ALLOWED_IPS.
+    """
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    response = HttpResponse(
+        process_metrics.exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,115 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from wagtail import hooks
+
+from .conditional import page_validators, supports_conditional_get
+from .dependencies import (
+    page_dependency_keys,
+    page_key,
+    save_page_dependencies,
+    tracking,
+)
+from .rich_text import (
+    BulkPageLinkHandler,
+    prefetch_rich_text,
+    rendering,
+    rich_text_sources,
+)
+
+
+@hooks.register("register_rich_text_features", order=1)
+def register_bulk_page_links(features):
+    # After Wagtail's own (order 0) PageLinkHandler, which it replaces
+    features.register_link_type(BulkPageLinkHandler)
+
+
+@hooks.register("before_serve_page")
+def remember_page(page, request, serve_args, serve_kwargs):
+    # For middlewares that act on page responses (e.g. EdgeCacheMiddleware)
+    request.wagtail_page = page
+
+
+# on_serve_page hooks wrap each other in order, the lowest outermost:
+# Wagtail's check_view_restrictions (order 0) must wrap them all, or a
+# restricted page would answer 304s without checking access.
+@hooks.register("on_serve_page", order=1)
+def conditional_get(next_serve_page):
+    """
+    Answer If-None-Match / If-Modified-Since for pages before they are
+    served, so a 304 skips get_context and template rendering entirely.
+    Runs inside Wagtail's view-restriction check.
+    """
+
+    def wrapper(page, request, args, kwargs):
+        if not supports_conditional_get(page, request):
+            return next_serve_page(page, request, args, kwargs)
+
+        keys = page_dependency_keys(page.pk)
+        etag, last_modified = page_validators(page, keys)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is None:
+            response = next_serve_page(page, request, args, kwargs)
+            if response.status_code != 200:
+                return response
+            rendered = set(request.cache_dependencies) - {page_key(page.pk)}
+            if rendered != set(keys):
+                # First tracked render, or it used something new: validate
+                # what was just sent, not what the previous render used
+                etag, last_modified = page_validators(page, sorted(rendered))
+
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        if not response.has_header("Cache-Control"):
+            # Revalidate every time: a publish must show up immediately
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    return wrapper
+
+
+@hooks.register("on_serve_page", order=2)
+def track_dependencies(next_serve_page):
+    """
+    Record what the page's render uses (core.dependencies). Runs inside
+    conditional_get, so 304s skip it. The template response is rendered
+    here rather than by the handler, so the rendering is tracked too.
+    """
+
+    def wrapper(page, request, args, kwargs):
+        with tracking() as keys:
+            response = next_serve_page(page, request, args, kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+
+        request.cache_dependencies = keys
+        if response.status_code == 200 and supports_conditional_get(page, request):
+            save_page_dependencies(page.pk, keys)
+        return response
+
+    return wrapper
+
+
+@hooks.register("on_serve_page", order=3)
+def prefetch_page_rich_text(next_serve_page):
+    """
+    Expand the page's uncached rich text in one pass before it renders
+    (core.rich_text), so links cost one query per type, not per field.
+    """
+
+    def wrapper(page, request, args, kwargs):
+        with rendering():
+            prefetch_rich_text(*rich_text_sources(page))
+            response = next_serve_page(page, request, args, kwargs)
+            # Rendered here so the |cached_richtext filters still find the
+            # expansions without a shared cache
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        return response
+
+    return wrapper
@@ -2,8 +2,10 @@ from django.db import models
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, PageChooserPanel
 from wagtail.fields import RichTextField, StreamField
-from wagtail.images.blocks import ImageChooserBlock
 from wagtail.models import Page
+from wagtail.search import index
+
+from core.blocks import ImageChooserBlock
 
 
 class WelcomePage(Page):
@@ -138,3 +140,11 @@ class HomePage(Page):
         FieldPanel("about"),
         FieldPanel("about_image"),
     ]
+
+    search_fields = Page.search_fields + [
+        index.SearchField("intro_text", boost=2),
+        index.SearchField("mission_statement", boost=2),
+        index.SearchField("services"),
+        index.SearchField("about"),
+    ]
+    search_auto_update = False
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journalism', '0008_delete_writtenarticlepage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audioitem',
+            index=models.Index(fields=['page', '-audio_date', '-id'], name='audioitem_page_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoitem',
+            index=models.Index(fields=['page', '-video_date', '-id'], name='videoitem_page_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='writtenarticleitem',
+            index=models.Index(fields=['page', 'sort_order'], name='articleitem_page_order_idx'),
+        ),
+    ]
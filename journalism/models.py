@@ -10,6 +10,11 @@ from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.fields import RichTextField
 from wagtail.models import Orderable, Page
+from wagtail.search import index
+
+from core.dependencies import record
+from core.embeds import prefetch_embeds
+from core.rich_text import prefetch_rich_text
 
 if TYPE_CHECKING:
     # Only for type hints; doesn't import at runtime (avoids hard coupling)
@@ -29,13 +34,29 @@ def get_bts_teasers(limit: int = 3) -> List["BTSPage"]:
     except ImportError:
         return []
 
+    # The newest teasers change whenever any BTS page is published
+    # (BTSPage.get_purge_keys)
+    record("bts")
     return list(
         BTSPage.objects.live()
-        .specific()
+        .teasers()
         .order_by("-first_published_at")[:limit]
     )
 
 
+def get_bts_dependencies():
+    """
+    All BTS pages: journalism pages render the newest of them as teasers, so
+    publishing any one can change their HTML (see core.conditional).
+    """
+    try:
+        from behind_scenes.models import BTSPage
+    except ImportError:
+        return Page.objects.none()
+
+    return BTSPage.objects.all()
+
+
 # ======================
 # WRITTEN
 # ======================
@@ -50,6 +71,20 @@ class WrittenPage(Page):
         MultiFieldPanel([InlinePanel("articles", label="Article")], heading="Articles"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("intro"),
+        index.RelatedFields(
+            "articles",
+            [
+                index.SearchField("title", boost=3),
+                index.SearchField("publication_name", boost=2),
+                index.SearchField("excerpt"),
+            ],
+        ),
+    ]
+    # Indexed from the publish signal in a background task (see search.tasks)
+    search_auto_update = False
+
     parent_page_types = ["home.HomePage"]
     subpage_types = []
 
@@ -77,6 +112,13 @@ class WrittenPage(Page):
         )
         return ctx
 
+    def get_search_items(self):
+        """Rows indexed as their own search documents (see search.documents)."""
+        return self.articles.all()
+
+    def get_cache_dependencies(self):
+        return get_bts_dependencies()
+
 
 class WrittenArticleItem(Orderable):
     page = ParentalKey(WrittenPage, related_name="articles", on_delete=models.CASCADE)
@@ -98,8 +140,32 @@ class WrittenArticleItem(Orderable):
         FieldPanel("external_url"),
         FieldPanel("excerpt"),
     ]
-    
-    
+
+    class Meta(Orderable.Meta):
+        indexes = [
+            # page.articles.all(): one page's rows in editor (sort_order) order
+            models.Index(
+                fields=["page", "sort_order"], name="articleitem_page_order_idx"
+            ),
+        ]
+
+    @property
+    def anchor_id(self) -> str:
+        """HTML id of this row on the WrittenPage (search results deep-link here)."""
+        return f"article-{self.pk}"
+
+    def get_search_document(self) -> dict:
+        return {
+            "kind": "article",
+            "title": self.title,
+            "subtitle": self.publication_name,
+            "body": self.excerpt,
+            "date": self.publication_date,
+            "external_url": self.external_url,
+            "anchor": self.anchor_id,
+        }
+
+
 # ======================
 # VIDEO
 # ======================
@@ -119,6 +185,20 @@ class VideoPage(Page):
         MultiFieldPanel([InlinePanel("videos", label="Video")], heading="Videos"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("intro"),
+        index.RelatedFields(
+            "videos",
+            [
+                index.SearchField("standfirst", boost=3),
+                index.SearchField("description"),
+                index.SearchField("produced_by"),
+                index.SearchField("produced_for", boost=2),
+            ],
+        ),
+    ]
+    search_auto_update = False
+
     parent_page_types = ["home.HomePage"]
     subpage_types = []
 
@@ -127,6 +207,10 @@ class VideoPage(Page):
 
         year = date.today().year
         qs = list(self.videos.all())
+        # One expansion pass for every description (core.rich_text), one
+        # query for every embed (core.embeds)
+        prefetch_rich_text(*(video.description for video in qs))
+        prefetch_embeds(*(video.embed_url for video in qs))
 
         def pubdate(item):
             if item.video_date:
@@ -156,6 +240,12 @@ class VideoPage(Page):
         )
         return ctx
 
+    def get_search_items(self):
+        return self.videos.all()
+
+    def get_cache_dependencies(self):
+        return get_bts_dependencies()
+
 
 class VideoItem(Orderable):
     """
@@ -200,12 +290,33 @@ class VideoItem(Orderable):
 
     class Meta(Orderable.Meta):
         ordering = ["-video_date", "-id"]
+        indexes = [
+            # page.videos.all(): one page's rows in this ordering
+            models.Index(
+                fields=["page", "-video_date", "-id"], name="videoitem_page_date_idx"
+            ),
+        ]
 
     def __str__(self):
         label = self.standfirst or (self.produced_for or "Untitled")
         when = self.video_date.isoformat() if self.video_date else "No date"
         return f"{label} — {when}"
 
+    @property
+    def anchor_id(self) -> str:
+        return f"video-{self.pk}"
+
+    def get_search_document(self) -> dict:
+        return {
+            "kind": "video",
+            "title": self.standfirst or self.produced_for or "Untitled",
+            "subtitle": self.produced_for,
+            "body": [self.description, self.produced_by],
+            "date": self.video_date,
+            "external_url": self.external_url,
+            "anchor": self.anchor_id,
+        }
+
 
 # ======================
 # AUDIO
@@ -225,6 +336,21 @@ class AudioPage(Page):
         MultiFieldPanel([InlinePanel("audios", label="Audio")], heading="Audio items"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("intro"),
+        index.RelatedFields(
+            "audios",
+            [
+                index.SearchField("title", boost=3),
+                index.SearchField("standfirst", boost=2),
+                index.SearchField("description"),
+                index.SearchField("produced_by"),
+                index.SearchField("produced_for", boost=2),
+            ],
+        ),
+    ]
+    search_auto_update = False
+
     parent_page_types = ["home.HomePage"]
     subpage_types = []
 
@@ -233,6 +359,10 @@ class AudioPage(Page):
 
         year = date.today().year
         items = list(self.audios.all())
+        # One expansion pass for every description (core.rich_text), one
+        # query for every embed (core.embeds)
+        prefetch_rich_text(*(item.description for item in items))
+        prefetch_embeds(*(item.embed_url for item in items))
 
         def pubdate(item):
             if item.audio_date:
@@ -263,6 +393,12 @@ class AudioPage(Page):
         )
         return ctx
 
+    def get_search_items(self):
+        return self.audios.all()
+
+    def get_cache_dependencies(self):
+        return get_bts_dependencies()
+
 
 class AudioItem(Orderable):
     """
@@ -306,7 +442,28 @@ class AudioItem(Orderable):
 
     class Meta(Orderable.Meta):
         ordering = ["-audio_date", "-id"]
+        indexes = [
+            # page.audios.all(): one page's rows in this ordering
+            models.Index(
+                fields=["page", "-audio_date", "-id"], name="audioitem_page_date_idx"
+            ),
+        ]
 
     def __str__(self):
         when = self.audio_date.isoformat() if self.audio_date else "No date"
         return f"{self.title} — {when}"
+
+    @property
+    def anchor_id(self) -> str:
+        return f"audio-{self.pk}"
+
+    def get_search_document(self) -> dict:
+        return {
+            "kind": "audio",
+            "title": self.title,
+            "subtitle": self.produced_for,
+            "body": [self.standfirst, self.description, self.produced_by],
+            "date": self.audio_date,
+            "external_url": self.external_url,
+            "anchor": self.anchor_id,
+        }
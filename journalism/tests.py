@@ -1,3 +1,28 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import build_site
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is Postgres'")
+class ListingIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            # The test tables are tiny: make the planner show what it can use
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_item_rows_use_page_indexes(self):
+        listings = {
+            "videoitem_page_date_idx": self.site.video.videos.all(),
+            "audioitem_page_date_idx": self.site.audio.audios.all(),
+            "articleitem_page_order_idx": self.site.written.articles.all(),
+        }
+        for index_name, rows in listings.items():
+            with self.subTest(index=index_name):
+                self.assertIn(index_name, rows.explain())
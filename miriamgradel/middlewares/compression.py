@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+# Brotli is optional: without it, responses are gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "application/json",
+    "application/xml",
+    "text/xml",
+}
+
+
+def accepted_encodings(header: str) -> dict:
+    """``Accept-Encoding`` as ``{coding: q}``."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str):
+    """Best coding we can produce for the client: br, then gzip, or None."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, best: bool) -> bytes:
+    if encoding == "br":
+        return brotli.compress(
+            data, mode=brotli.MODE_TEXT, quality=11 if best else 5
+        )
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip for HTML, JSON and XML responses (WhiteNoise already serves
+    precompressed static files).
+
+    Responses with an ETag (published pages, see core.conditional) render the
+    same bytes until the next publish, so their compressed variant is stored
+    in the ``COMPRESSION_CACHE_ALIAS`` cache, keyed by a hash of the body, and
+    compressed once at the highest level. Everything else is compressed per
+    request at a fast level. Bodies under ``COMPRESSION_MIN_LENGTH`` bytes
+    are sent as they are.
+
+    Responses that render a CSRF token (and so set the CSRF cookie) are
+    never compressed: their length would leak the token (BREACH).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        content = response.content
+        etag = response.get("ETag")
+        if etag:
+            compressed = self.cached_compress(content, encoding)
+        else:
+            compressed = compress(content, encoding, best=False)
+        if len(compressed) >= len(content):
+            return response
+
+        response.content = compressed
+        response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(len(compressed))
+        if etag and not etag.startswith("W/"):
+            # Same document, different bytes: only weakly equal
+            response["ETag"] = f"W/{etag}"
+        return response
+
+    def should_compress(self, response) -> bool:
+        if response.streaming or response.status_code != 200:
+            return False
+        if response.has_header("Content-Encoding"):
+            return False
+        if settings.CSRF_COOKIE_NAME in response.cookies:
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return False
+        min_length = getattr(settings, "COMPRESSION_MIN_LENGTH", 1024)
+        return len(response.content) >= min_length
+
+    def cached_compress(self, content: bytes, encoding: str) -> bytes:
+        cache = caches[getattr(settings, "COMPRESSION_CACHE_ALIAS", "default")]
+        key = f"compressed:{encoding}:{hashlib.sha1(content).hexdigest()}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(content, encoding, best=True)
+            timeout = getattr(settings, "COMPRESSION_CACHE_TTL", None)
+            cache.set(key, compressed, timeout)
+        return compressed
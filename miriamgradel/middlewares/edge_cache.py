@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+from core.conditional import supports_conditional_get
+from core.dependencies import page_dependency_keys
+from core.edge import max_age_for, surrogate_keys
+
+
+class EdgeCacheMiddleware:
+    """
+    Lets a CDN cache anonymous Wagtail page responses and purge them by key.
+
+    Sets, for pages served through Wagtail (``request.wagtail_page``, see
+    core.wagtail_hooks):
+        Cache-Control: public, max-age=0, s-maxage=<per page type>,
+                       stale-while-revalidate=..., stale-if-error=...
+        Surrogate-Key: page-<id> [keys recorded while it rendered]
+
+    Browsers still revalidate every time (max-age=0, answered with a 304 from
+    the page's ETag); only the shared cache keeps the page, until it expires
+    or a publish purges one of its keys.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        page = getattr(request, "wagtail_page", None)
+        if page is None or response.status_code not in (200, 304):
+            return response
+        if response.cookies or not supports_conditional_get(page, request):
+            return response
+        if page.get_view_restrictions().exists():
+            return response
+
+        if response.has_header("Cache-Control"):
+            del response["Cache-Control"]
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            s_maxage=max_age_for(page),
+            stale_while_revalidate=getattr(
+                settings, "EDGE_CACHE_STALE_WHILE_REVALIDATE", 60
+            ),
+            stale_if_error=getattr(settings, "EDGE_CACHE_STALE_IF_ERROR", 86400),
+        )
+        recorded = getattr(request, "cache_dependencies", None)
+        if recorded is None:
+            # 304: nothing rendered, reuse what the last render recorded
+            recorded = page_dependency_keys(page.pk)
+        header = getattr(settings, "EDGE_CACHE_KEY_HEADER", "Surrogate-Key")
+        response[header] = " ".join(surrogate_keys(page, recorded))
+        return response
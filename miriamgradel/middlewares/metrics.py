@@ -0,0 +1,45 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core import metrics
+
+
+class MetricsMiddleware:
+    """
+    Records every request's latency and query count (core.metrics), labelled
+    with the Wagtail page type it served, if any, and the view that served
+    it, then lets the process fold its metrics into the shared store.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        labels = self.labels(request)
+        metrics.observe("http_request_duration_seconds", duration, **labels)
+        metrics.inc("db_queries_total", queries[0], **labels)
+        metrics.flush(force=False)
+        return response
+
+    def labels(self, request) -> dict[str, str]:
+        route = getattr(request, "_wagtail_route_for_request", None)
+        match = getattr(request, "resolver_match", None)
+        return {
+            "page_type": type(route[0]).__name__ if route else "",
+            "view": match.view_name if match else "",
+        }
@@ -0,0 +1,79 @@
+from wagtail import views as wagtail_views
+
+from behind_scenes import views as behind_scenes_views
+from core import views as core_views
+from core.db_routers import (
+    available_replica,
+    lag_seconds,
+    primary_pinned,
+    reading_from,
+    replica_reads_enabled,
+)
+from search import views as search_views
+
+PIN_COOKIE = "db_primary"
+
+
+class ReplicaReadsMiddleware:
+    """
+    Sends the reads of anonymous GET/HEAD page, search and sitemap requests
+    to a read replica (core.db_routers), unless:
+
+    - the session wrote within DB_REPLICA_LAG_SECONDS (PIN_COOKIE), so it
+      reads its own writes, e.g. after a WorkWithMePage form submission;
+    - content changed within that window (core.db_routers.pin_primary);
+    - no replica accepts connections.
+
+    Only with a shared cache (SHARED_CACHE), where content changes pin
+    every worker; otherwise everything reads from the primary.
+
+    A POST (or other unsafe request) that writes sets PIN_COOKIE on its
+    response. Bookkeeping writes during a GET (e.g. a page's recorded
+    dependencies) don't: they only send that request's later reads to the
+    primary, and keep cacheable pages free of Set-Cookie.
+    """
+
+    replica_views = (
+        wagtail_views.serve,
+        search_views.search,
+        search_views.autocomplete,
+        core_views.sitemap,
+        behind_scenes_views.teasers,
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_reads_enabled():
+            return self.get_response(request)
+
+        with reading_from(None) as reads:
+            request._db_reads = reads
+            response = self.get_response(request)
+
+        if reads.wrote and request.method not in ("GET", "HEAD", "OPTIONS"):
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=lag_seconds(),
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        reads = getattr(request, "_db_reads", None)
+        if (
+            reads is None
+            or reads.wrote
+            or view_func not in self.replica_views
+            or request.method not in ("GET", "HEAD")
+            or PIN_COOKIE in request.COOKIES
+            or request.user.is_authenticated
+            or primary_pinned()
+        ):
+            return None
+        reads.database = available_replica()
+        return None
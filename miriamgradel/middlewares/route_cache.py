@@ -0,0 +1,39 @@
+from django.utils.translation import get_language
+from wagtail import views as wagtail_views
+
+from core.routing import cached_route, remember_route
+
+
+class RouteCacheMiddleware:
+    """
+    Skips Wagtail's page tree walk for URLs it has routed before.
+
+    For requests resolved to Wagtail's serve view, a cached route (core.routing)
+    pre-fills ``request._wagtail_route_for_request``, which
+    ``Page.route_for_request`` returns as is. Routes Wagtail had to look up
+    are cached on the way out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        route_key = getattr(request, "_route_cache_key", None)
+        if route_key is not None and hasattr(request, "_wagtail_route_for_request"):
+            remember_route(*route_key, request._wagtail_route_for_request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func is not wagtail_views.serve:
+            return None
+        path = view_args[0] if view_args else view_kwargs.get("path", "")
+        route_key = (request.get_host(), get_language(), path)
+
+        route = cached_route(*route_key)
+        if route is not None:
+            request._wagtail_route_for_request = route
+        else:
+            request._route_cache_key = route_key
+        return None
@@ -0,0 +1,110 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core.timing import collecting, record_query
+
+logger = logging.getLogger("miriamgradel.timing")
+
+
+class ServerTimingMiddleware:
+    """
+    Times a sample of requests (SERVER_TIMING_SAMPLE_RATE, 0..1) by phase —
+    database, cache, view, template rendering, renditions and embeds (see
+    core.timing) — and reports them in a ``Server-Timing`` header and one
+    JSON log line on the ``miriamgradel.timing`` logger. Responses a CDN
+    may cache (``s-maxage`` or ``public``) only get the log line, so one
+    request's timings are not replayed to every visitor.
+
+    Unsampled requests cost a random number.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0)
+        if rate <= 0 or random.random() >= rate:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with collecting() as timings, ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(record_query))
+            request._timings = timings
+            response = self.get_response(request)
+
+            end = time.perf_counter()
+            view_start = getattr(request, "_timing_view_start", None)
+            render_start = getattr(request, "_timing_render_start", None)
+            if render_start is not None:
+                timings.add("view", render_start - view_start)
+                timings.add("render", end - render_start)
+            elif view_start is not None:
+                timings.add("view", end - view_start)
+        timings.add("total", end - start)
+
+        if not self.shared_cacheable(response):
+            response["Server-Timing"] = self.header(timings)
+        logger.info(self.log_line(request, response, timings))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_timings"):
+            request._timing_view_start = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # The view has returned; the template renders after this hook
+        if hasattr(request, "_timings"):
+            request._timing_render_start = time.perf_counter()
+        return response
+
+    def shared_cacheable(self, response) -> bool:
+        directives = {
+            directive.split("=", 1)[0].strip().lower()
+            for directive in response.get("Cache-Control", "").split(",")
+        }
+        return bool(directives & {"s-maxage", "public"})
+
+    def header(self, timings) -> str:
+        entries = []
+        for name, phase in timings.phases.items():
+            entry = f"{name};dur={phase.duration * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{phase.count} queries"'
+            elif name == "cache":
+                entry += (
+                    f';desc="{timings.cache_hits} hits / '
+                    f'{timings.cache_misses} misses"'
+                )
+            elif name in ("rendition", "embed"):
+                # Their time is also part of view/render
+                entry += f';desc="{phase.count} generated"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+    def log_line(self, request, response, timings) -> str:
+        route = getattr(request, "_wagtail_route_for_request", None)
+        return json.dumps(
+            {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "page_type": type(route[0]).__name__ if route else None,
+                "phases": {
+                    name: {
+                        "ms": round(phase.duration * 1000, 1),
+                        "count": phase.count,
+                    }
+                    for name, phase in timings.phases.items()
+                },
+                "cache_hits": timings.cache_hits,
+                "cache_misses": timings.cache_misses,
+            }
+        )
@@ -0,0 +1,16 @@
+from core.sites import site_for_request
+
+
+class SiteRegistryMiddleware:
+    """
+    Resolves the request's Site from the in-process registry (core.sites),
+    so Wagtail's ``Site.find_for_request`` — routing, redirects, URL building,
+    ``{% wagtail_site %}`` — never queries for it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        site_for_request(request)
+        return self.get_response(request)
@@ -31,6 +31,13 @@ ALLOWED_HOSTS = [
     if host.strip()
 ]
 
+# Identifies the deployed code. Page ETags include it, so a deploy (new
+# templates / static file names) never answers with a stale 304. Heroku sets
+# HEROKU_RELEASE_VERSION when runtime dyno metadata is enabled.
+RELEASE_VERSION = os.getenv("RELEASE_VERSION") or os.getenv(
+    "HEROKU_RELEASE_VERSION", ""
+)
+
 # Fail fast in production if SECRET_KEY not set properly
 if not DEBUG and SECRET_KEY in {"", "change-me-in-prod"}:
     raise RuntimeError(
@@ -56,6 +63,7 @@ INSTALLED_APPS = [
     "journalism",
     "behind_scenes",
     "work_with_me",
+    "core",
     # Wagtail
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
@@ -88,6 +96,12 @@ INSTALLED_APPS = [
 # -------------------------------------------------------------------
 MIDDLEWARE = [
 
+    # Latency, query and cache metrics for every request (core.metrics)
+    "miriamgradel.middlewares.metrics.MetricsMiddleware",
+
+    # Server-Timing + a JSON log line for a sample of requests (core.timing)
+    "miriamgradel.middlewares.server_timing.ServerTimingMiddleware",
+
     "django.middleware.security.SecurityMiddleware",
 
     # Use WhiteNoise if available (gzip/brotli + cache busting for static)
@@ -97,6 +111,9 @@ MIDDLEWARE = [
         else []
     ),
 
+    # Brotli/gzip for HTML/JSON/XML (static files are WhiteNoise's job)
+    "miriamgradel.middlewares.compression.CompressionMiddleware",
+
     "django.contrib.sessions.middleware.SessionMiddleware",
 
     # Locale middleware must be after Session and before Common
@@ -108,6 +125,18 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 
+    # Request -> Site from the in-process registry (core.sites)
+    "miriamgradel.middlewares.site_registry.SiteRegistryMiddleware",
+
+    # Anonymous page/search/sitemap reads from a replica (core.db_routers)
+    "miriamgradel.middlewares.replica_reads.ReplicaReadsMiddleware",
+
+    # Cached path -> page lookups for Wagtail's serve view (core.routing)
+    "miriamgradel.middlewares.route_cache.RouteCacheMiddleware",
+
+    # CDN lifetimes + surrogate keys for anonymous page responses
+    "miriamgradel.middlewares.edge_cache.EdgeCacheMiddleware",
+
     # Wagtail redirects near the end
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
 ]
@@ -140,10 +169,18 @@ TEMPLATES = [
 # -------------------------------------------------------------------
 # Database
 # -------------------------------------------------------------------
+# DB_ENGINE=django.db.backends.sqlite3 runs single-node on SQLite (the
+# Docker image does): WAL and tuned pragmas, see _configure_connections.
+_DB_ENGINE = os.getenv("DB_ENGINE", "django.db.backends.postgresql")
+_SQLITE = "django.db.backends.sqlite3"
+
 DATABASES = {
     "default": {
-        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.postgresql"),
-        "NAME": os.getenv("DB_NAME", "miriamg"),
+        "ENGINE": _DB_ENGINE,
+        "NAME": os.getenv(
+            "DB_NAME",
+            str(BASE_DIR / "db.sqlite3") if _DB_ENGINE == _SQLITE else "miriamg",
+        ),
         "USER": os.getenv("DB_USER", "lilla"),
         "PASSWORD": os.getenv("DB_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", "localhost"),
@@ -163,10 +200,107 @@ if db_url:
 
     DATABASES["default"] = dj_database_url.config(
         default=db_url,
-        conn_max_age=600,
         ssl_require=not DEBUG,
     )
 
+# Read replicas (core.db_routers): comma-separated database URLs, e.g.
+# DB_REPLICA_URLS=postgres://..@replica-1/miriamg,postgres://..@replica-2/miriamg
+# Anonymous page, search and sitemap reads go to them, with a shared cache
+# only (SHARED_CACHE below). Run the test suite without it: a replica
+# connection can't see a TestCase's uncommitted data.
+_replica_urls = [
+    url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()
+]
+if _replica_urls:
+    try:
+        import dj_database_url
+    except ImportError as exc:
+        raise RuntimeError(
+            "DB_REPLICA_URLS is set but dj-database-url is not installed."
+        ) from exc
+
+    for _number, _url in enumerate(_replica_urls, start=1):
+        DATABASES[f"replica_{_number}"] = {
+            **dj_database_url.parse(
+                _url, ssl_require=not DEBUG and _url.startswith("postgres")
+            ),
+            # Tests read the primary's test database through it
+            "TEST": {"MIRROR": "default"},
+        }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_routers.ReplicaRouter"] if REPLICA_DATABASES else []
+
+# After a write, the writing session (and, after a content change, every
+# request) reads from the primary for this long: the replicas' expected lag.
+DB_REPLICA_LAG_SECONDS = int(os.getenv("DB_REPLICA_LAG_SECONDS", "10"))
+# A replica that failed to connect is skipped for this long
+DB_REPLICA_RETRY_SECONDS = int(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# SQLite: WAL lets reads run alongside the (single) writer; NORMAL sync is
+# safe under WAL; reads come from a shared memory map. Write transactions
+# start IMMEDIATE so writers queue on the busy timeout up front instead of
+# failing with "database is locked" when upgrading a read lock. The cost:
+# every atomic block takes the write lock, even one that only reads, so
+# atomic blocks (Wagtail admin saves, publishing) run one at a time.
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "20"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Connection reuse, whichever way the database is configured. With psycopg 3
+# and psycopg-pool installed, each process keeps a pool sized to its gunicorn
+# threads (one connection per thread; WEB_CONCURRENCY x GUNICORN_THREADS in
+# total); otherwise connections persist for DB_CONN_MAX_AGE seconds. Either
+# way a reused connection is checked before a request gets it.
+try:
+    import psycopg_pool  # noqa: F401
+
+    _HAS_PSYCOPG_POOL = True
+except Exception:
+    _HAS_PSYCOPG_POOL = False
+
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+_DB_POOL_ENABLED = os.getenv("DB_POOL", "True").lower() in {"1", "true", "yes"}
+DB_POOL = _HAS_PSYCOPG_POOL and _DB_POOL_ENABLED
+
+
+def _configure_connections(database: dict) -> None:
+    database["CONN_HEALTH_CHECKS"] = True
+    if database["ENGINE"] == _SQLITE:
+        database.setdefault("OPTIONS", {}).update(
+            {
+                "init_command": "; ".join(SQLITE_PRAGMAS),
+                "transaction_mode": "IMMEDIATE",
+                "timeout": SQLITE_BUSY_TIMEOUT,
+            }
+        )
+    if DB_POOL and database["ENGINE"] == "django.db.backends.postgresql":
+        from psycopg_pool import ConnectionPool
+
+        # The pool owns connection lifetimes (Django refuses both)
+        database["CONN_MAX_AGE"] = 0
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(
+                os.getenv("DB_POOL_MAX_SIZE", os.getenv("GUNICORN_THREADS", "1"))
+            ),
+            "max_idle": DB_CONN_MAX_AGE,
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "check": ConnectionPool.check_connection,
+        }
+    else:
+        database["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+
+
+for _database in DATABASES.values():
+    _configure_connections(_database)
+
 # -------------------------------------------------------------------
 # Password validation
 # -------------------------------------------------------------------
@@ -264,13 +398,99 @@ WHITENOISE_MAX_AGE = 60 * 60 * 24 * 365  # 1 year
 # -------------------------------------------------------------------
 # Caching (simple local cache; upgrade to Redis in prod if needed)
 # -------------------------------------------------------------------
+# REDIS_URL (e.g. Heroku Data for Redis) switches the default cache to Redis
+# so cached fragments, search results and their regeneration locks are
+# shared by all workers (redis-py is in requirements.txt).
+REDIS_URL = os.getenv("REDIS_URL", "")
+# Caches invalidated on publish (block and swr fragments, rich text, routes,
+# replica pinning) are only used when the default cache is shared by every
+# worker: LocMem is per process, so an invalidation would only reach one.
+SHARED_CACHE = bool(REDIS_URL) or os.getenv("SHARED_CACHE", "False").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+
 CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "miriamgradel-site",
-    }
+    "default": (
+        {
+            "BACKEND": "core.cache_backends.InstrumentedRedisCache",
+            "LOCATION": REDIS_URL,
+            "ALIAS": "default",
+        }
+        if REDIS_URL
+        else {
+            "BACKEND": "core.cache_backends.InstrumentedLocMemCache",
+            "LOCATION": "miriamgradel-site",
+            "ALIAS": "default",
+        }
+    ),
+    # Compressed page bodies (miriamgradel.middlewares.compression); kept
+    # apart so large entries don't evict everything else.
+    "compression": {
+        "BACKEND": "core.cache_backends.InstrumentedLocMemCache",
+        "LOCATION": "miriamgradel-compression",
+        "ALIAS": "compression",
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
 }
 
+# Stale-while-revalidate (core/cache.py, {% swrcache %}): past its soft TTL
+# an entry is still served for up to SWR_CACHE_STALE_TTL seconds while one
+# request, holding a lock for at most SWR_CACHE_LOCK_TIMEOUT, refreshes it.
+# On a cold miss other requests wait up to SWR_CACHE_LOCK_WAIT seconds for it.
+SWR_CACHE_STALE_TTL = int(os.getenv("SWR_CACHE_STALE_TTL", str(60 * 60 * 24)))
+SWR_CACHE_LOCK_TIMEOUT = 30
+SWR_CACHE_LOCK_WAIT = 2.0
+# Without a shared cache a fragment can't be dropped in every worker on
+# publish: each process keeps it this long at most (capped by soft_ttl)
+SWR_CACHE_LOCAL_TTL = int(os.getenv("SWR_CACHE_LOCAL_TTL", "60"))
+
+# StreamField block fragments ({% blockcache %}) are keyed by block content:
+# a publish makes new keys, the old ones just age out
+BLOCK_CACHE_TTL = 60 * 60 * 24
+
+# Wagtail routes (path -> page) are dropped on any structural change anyway
+ROUTE_CACHE_TTL = 60 * 60 * 24
+
+# Expanded rich text (core.rich_text) is keyed by its stored source
+RICH_TEXT_CACHE_TTL = 60 * 60 * 24
+
+# oEmbed HTML ({% embed %}, core.embeds), at most until the embed's own
+# cache_until
+EMBED_CACHE_TTL = 60 * 60 * 24
+
+COMPRESSION_CACHE_ALIAS = "compression"
+# A publish changes the body (and so the key); old variants just age out
+COMPRESSION_CACHE_TTL = 60 * 60 * 24
+COMPRESSION_MIN_LENGTH = 1024
+
+# -------------------------------------------------------------------
+# Edge cache (CDN in front of the site)
+# -------------------------------------------------------------------
+# Anonymous page responses are cacheable by a shared cache for s-maxage
+# seconds (per page type, keyed "app_label.model") and tagged with surrogate
+# keys; publishing purges the affected keys through the purge backend
+# (core.purge). Browsers always revalidate against the page ETag.
+EDGE_CACHE_MAX_AGE = {
+    "default": int(os.getenv("EDGE_CACHE_MAX_AGE", "3600")),
+    # Splash page, edited rarely
+    "home.welcomepage": 86400,
+}
+EDGE_CACHE_STALE_WHILE_REVALIDATE = 60
+EDGE_CACHE_STALE_IF_ERROR = 86400
+EDGE_CACHE_KEY_HEADER = os.getenv("EDGE_CACHE_KEY_HEADER", "Surrogate-Key")
+
+EDGE_CACHE_PURGE_BACKEND = os.getenv(
+    "EDGE_CACHE_PURGE_BACKEND", "core.purge.NullPurgeBackend"
+)
+EDGE_CACHE_PURGE_OPTIONS = {}
+if EDGE_CACHE_PURGE_BACKEND == "core.purge.FastlyPurgeBackend":
+    EDGE_CACHE_PURGE_OPTIONS = {
+        "service_id": os.getenv("FASTLY_SERVICE_ID", ""),
+        "api_token": os.getenv("FASTLY_API_TOKEN", ""),
+    }
+
 # -------------------------------------------------------------------
 # Wagtail
 # -------------------------------------------------------------------
@@ -280,6 +500,69 @@ WAGTAILSEARCH_BACKENDS = {
     "default": {"BACKEND": "wagtail.search.backends.database"},
 }
 
+# Site search (search/results.py): ranked ids are cached per normalised
+# query + language and dropped whenever a publish rebuilds documents.
+SEARCH_RESULTS_CACHE_TTL = int(os.getenv("SEARCH_RESULTS_CACHE_TTL", "300"))
+SEARCH_RESULTS_PER_PAGE = 10
+SEARCH_MAX_RESULTS = 500
+
+# sitemap.xml is rebuilt on publish (core.sitemap); past this many URLs it
+# becomes an index over sitemap-<n>.xml sections (protocol limit: 50,000).
+SITEMAP_MAX_URLS = 50000
+
+# -------------------------------------------------------------------
+# Instrumentation
+# -------------------------------------------------------------------
+# Share of requests timed by phase (ServerTimingMiddleware, core.timing):
+# a Server-Timing header plus one JSON line on the miriamgradel.timing
+# logger each. 0 turns it off; e.g. 0.01 in production, 1 when profiling.
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+
+# Metrics of every request (core.metrics), summed across workers in a SQLite
+# file under METRICS_DIR (default: <tmp>/miriamgradel-metrics) and served at
+# /metrics to the addresses in METRICS_ALLOWED_IPS only.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+
+# Keeps the test suite's metrics in a temporary METRICS_DIR
+TEST_RUNNER = "core.test_runner.TestRunner"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "miriamgradel.timing": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# -------------------------------------------------------------------
+# Background tasks (django-tasks)
+# -------------------------------------------------------------------
+# Search indexing runs on publish through this backend. The immediate backend
+# runs tasks in-process after commit; set TASKS_BACKEND to
+# "django_tasks.backends.database.DatabaseBackend" and enable the `worker`
+# process (commented out in the Procfile: its db_worker command only exists
+# with this backend) to move that work off the request entirely.
+TASKS_BACKEND = os.getenv(
+    "TASKS_BACKEND", "django_tasks.backends.immediate.ImmediateBackend"
+)
+TASKS = {"default": {"BACKEND": TASKS_BACKEND}}
+
+if TASKS_BACKEND.startswith("django_tasks.backends.database"):
+    INSTALLED_APPS += ["django_tasks", "django_tasks.backends.database"]
+
 WAGTAILADMIN_BASE_URL = os.getenv(
     "WAGTAILADMIN_BASE_URL", "http://localhost:8000"
 )
@@ -6,9 +6,9 @@ from django.urls import include, path
 
 from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
-from wagtail.contrib.sitemaps.views import sitemap as wagtail_sitemap
 from wagtail.documents import urls as wagtaildocs_urls
 
+from core import views as core_views
 from search import views as search_views
 
 from .views import robots_txt
@@ -20,19 +20,31 @@ urlpatterns = [
     path("documents/", include(wagtaildocs_urls)),
 
     # Project routes
-    path("search/", search_views.search, name="search"),
     path("wme/", include("work_with_me.urls", namespace="work_with_me")),
 
     # i18n helper
     path("django-i18n/", include("django.conf.urls.i18n")),
 
     # SEO endpoints
-    path("sitemap.xml", wagtail_sitemap),
+    # Prebuilt on publish and stored gzipped (core.sitemap)
+    path("sitemap.xml", core_views.sitemap, name="sitemap"),
+    path("sitemap-<int:section>.xml", core_views.sitemap, name="sitemap_section"),
     path("robots.txt", robots_txt),
+
+    # Prometheus text format, local scrapers only (core.metrics)
+    path("metrics", core_views.metrics, name="metrics"),
 ]
 
 # Wagtail page serving (i18n-aware). Default language has no /en/ prefix.
+# Search lives here too so /da/search/ and /ja/search/ search their locale.
 urlpatterns += i18n_patterns(
+    path("search/", search_views.search, name="search"),
+    path(
+        "search/autocomplete/",
+        search_views.autocomplete,
+        name="search_autocomplete",
+    ),
+    path("", include("behind_scenes.urls", namespace="behind_scenes")),
     path("", include(wagtail_urls)),
     prefix_default_language=False,
 )
@@ -46,4 +58,3 @@ if settings.DEBUG:
         settings.MEDIA_URL,
         document_root=settings.MEDIA_ROOT,
     )
-
@@ -0,0 +1,182 @@
+# search/autocomplete.py
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+
+from .models import SearchDocument
+from .results import get_generation, normalise_query
+from .text import CJK_RUN, active_language
+
+MIN_QUERY_LENGTH = 2
+TRIGRAM_THRESHOLD = 0.3
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    title: str
+    url: str
+    kind: str
+
+    def as_dict(self) -> dict:
+        return {"title": self.title, "url": self.url, "kind": self.kind}
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixIndex:
+    """
+    In-memory suggestion index built from SearchDocument in one query:
+    page and item titles, BTS teaser titles (the BTS page document title)
+    and publication names.
+
+    Lookups are a bisect over sorted word tokens (prefix match anywhere in a
+    title), with a trigram fallback for typos. Unspaced CJK text is indexed
+    from every character, so typing the middle of a Japanese title matches.
+    """
+
+    def __init__(self, suggestions: list[Suggestion]):
+        self.suggestions = suggestions
+        self.labels = [normalise_query(s.title) for s in suggestions]
+
+        tokens = []
+        self.words: dict[str, set[int]] = defaultdict(set)
+        for position, label in enumerate(self.labels):
+            tokens.append((label, position))
+            for word in label.split():
+                tokens.append((word, position))
+                self.words[word].add(position)
+            for run in CJK_RUN.finditer(label):
+                for start in range(run.start() + 1, run.end()):
+                    tokens.append((label[start:], position))
+        tokens.sort()
+
+        self.trigrams: dict[str, set[str]] = defaultdict(set)
+        for word in self.words:
+            for gram in _trigrams(word):
+                self.trigrams[gram].add(word)
+        self.tokens = tokens
+        self.keys = [token for token, _ in tokens]
+
+    @classmethod
+    def build(cls, language: str) -> "PrefixIndex":
+        rows = (
+            SearchDocument.objects.filter(locale__language_code=language)
+            .order_by("kind", "title")
+            .values_list("kind", "title", "subtitle", "url", "external_url")
+        )
+        seen = set()
+        suggestions = []
+        for kind, title, subtitle, url, external_url in rows:
+            candidates = [(title, external_url or url, kind)]
+            if kind == SearchDocument.KIND_ARTICLE and subtitle:
+                # Publication names suggest a search rather than a page
+                candidates.append((subtitle, "", "publication"))
+            for label, href, label_kind in candidates:
+                key = (normalise_query(label), href)
+                if label and key not in seen:
+                    seen.add(key)
+                    suggestions.append(Suggestion(label, href, label_kind))
+        return cls(suggestions)
+
+    def prefix(self, query: str, limit: int) -> list[int]:
+        matches: list[int] = []
+        start = bisect.bisect_left(self.keys, query)
+        for token, position in self.tokens[start:]:
+            if not token.startswith(query):
+                break
+            if position not in matches:
+                matches.append(position)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def fuzzy(self, query: str, limit: int, exclude: list[int]) -> list[int]:
+        """Trigram similarity of the word being typed against indexed words."""
+        term = query.split()[-1]
+        grams = _trigrams(term)
+        shared: dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for word in self.trigrams.get(gram, ()):
+                shared[word] += 1
+
+        scored = []
+        for word, count in shared.items():
+            score = count / (len(grams) + len(_trigrams(word)) - count)
+            if score >= TRIGRAM_THRESHOLD:
+                scored.append((-score, word))
+
+        matches: list[int] = []
+        for _, word in sorted(scored):
+            for position in sorted(self.words[word]):
+                if position not in exclude and position not in matches:
+                    matches.append(position)
+            if len(matches) >= limit:
+                break
+        return matches[:limit]
+
+    def lookup(self, query: str, limit: int) -> list[Suggestion]:
+        positions = self.prefix(query, limit)
+        if len(positions) < limit and len(query) >= 3:
+            positions += self.fuzzy(query, limit - len(positions), positions)
+        return [self.suggestions[p] for p in positions]
+
+
+class AutocompleteCache:
+    """
+    Per-process index per language, plus an LRU of hot prefixes. Both are
+    keyed by the search generation (one cache key, or one primary-key
+    lookup without a shared cache), so a publish in any process rebuilds
+    them everywhere.
+    """
+
+    def __init__(self, max_prefixes: int = 2048):
+        self.max_prefixes = max_prefixes
+        self._lock = threading.Lock()
+        self._indexes: dict[tuple[int, str], PrefixIndex] = {}
+        self._prefixes: OrderedDict[tuple, list[Suggestion]] = OrderedDict()
+
+    def get_index(self, generation: int, language: str) -> PrefixIndex:
+        key = (generation, language)
+        index = self._indexes.get(key)
+        if index is None:
+            index = PrefixIndex.build(language)
+            with self._lock:
+                # Older generations are stale: keep only the current one
+                self._indexes = {
+                    k: v for k, v in self._indexes.items() if k[0] == generation
+                }
+                self._indexes[key] = index
+        return index
+
+    def suggest(self, query: str, limit: int = 8) -> list[Suggestion]:
+        language = active_language()
+        query = normalise_query(query)
+        # A single kanji/kana is already a meaningful prefix
+        if len(query) < MIN_QUERY_LENGTH and not CJK_RUN.match(query):
+            return []
+
+        generation = get_generation()
+        key = (generation, language, query, limit)
+
+        with self._lock:
+            hit = self._prefixes.get(key)
+            if hit is not None:
+                self._prefixes.move_to_end(key)
+                return hit
+
+        suggestions = self.get_index(generation, language).lookup(query, limit)
+
+        with self._lock:
+            self._prefixes[key] = suggestions
+            while len(self._prefixes) > self.max_prefixes:
+                self._prefixes.popitem(last=False)
+        return suggestions
+
+
+autocomplete_cache = AutocompleteCache()
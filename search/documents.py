@@ -0,0 +1,101 @@
+# search/documents.py
+from __future__ import annotations
+
+from django.db import transaction
+from django.utils.html import strip_tags
+from wagtail.search import index
+from wagtail.search.backends import get_search_backend
+
+from .models import SearchDocument
+
+
+def _text(value) -> str:
+    """Flatten a search field value (str / list from StreamField) to plain text."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(v) for v in value)
+    return " ".join(strip_tags(str(value)).split())
+
+
+def page_body_text(page) -> str:
+    """
+    Plain text of a page's own search fields. Orderable children
+    (RelatedFields) are left out: they get their own documents.
+    """
+    texts = []
+    for field in page.get_search_fields():
+        if isinstance(field, index.SearchField) and field.field_name != "title":
+            texts.append(_text(field.get_value(page)))
+    return " ".join(t for t in texts if t)
+
+
+def build_documents(page) -> list[SearchDocument]:
+    """
+    Unsaved SearchDocument rows for a live page: one for the page, plus one
+    per item from ``page.get_search_items()`` (see journalism.models).
+    """
+    url = page.get_url() or ""
+
+    documents = [
+        SearchDocument(
+            page=page,
+            locale=page.locale,
+            kind=SearchDocument.KIND_PAGE,
+            title=getattr(page, "card_title", "") or page.title,
+            subtitle=page.search_description or "",
+            body=page_body_text(page),
+            date=page.last_published_at.date() if page.last_published_at else None,
+            url=url,
+        )
+    ]
+
+    get_items = getattr(page, "get_search_items", None)
+    for item in get_items() if get_items else ():
+        data = item.get_search_document()
+        documents.append(
+            SearchDocument(
+                page=page,
+                locale=page.locale,
+                kind=data["kind"],
+                item_id=item.pk,
+                title=(data.get("title") or page.title)[:255],
+                subtitle=(data.get("subtitle") or "")[:255],
+                body=_text(data.get("body")),
+                date=data.get("date"),
+                url=f"{url}#{data['anchor']}" if data.get("anchor") else url,
+                external_url=data.get("external_url") or "",
+            )
+        )
+    return documents
+
+
+def remove_page_documents(page_id: int) -> None:
+    backend = get_search_backend()
+    stale = list(SearchDocument.objects.filter(page_id=page_id))
+    for document in stale:
+        backend.delete(document)
+    SearchDocument.objects.filter(page_id=page_id).delete()
+
+
+def sync_page_documents(page) -> bool:
+    """
+    Replace the documents for one page. Returns True when the page's URL
+    changed, so callers can refresh descendants whose URLs moved with it.
+    """
+    previous_url = (
+        SearchDocument.objects.filter(page_id=page.pk, kind=SearchDocument.KIND_PAGE)
+        .values_list("url", flat=True)
+        .first()
+    )
+
+    with transaction.atomic():
+        remove_page_documents(page.pk)
+        restricted = page.get_view_restrictions().exists()
+        if not page.live or page.is_root() or restricted:
+            return previous_url is not None
+
+        documents = SearchDocument.objects.bulk_create(build_documents(page))
+
+    get_search_backend().add_bulk(SearchDocument, documents)
+    return previous_url is not None and previous_url != documents[0].url
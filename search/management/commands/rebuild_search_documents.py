@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+
+from search.documents import sync_page_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed SearchDocument rows for every live page."
+
+    def handle(self, *args, **options):
+        count = 0
+        pages = Page.objects.live().filter(depth__gt=1).specific()
+        for page in pages.iterator():
+            sync_page_documents(page)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt search documents for {count} pages.")
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:14
+
+import django.db.models.deletion
+import wagtail.search.index
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('page', 'Page'), ('article', 'Article'), ('video', 'Video'), ('audio', 'Audio')], default='page', max_length=20)),
+                ('item_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('url', models.CharField(max_length=512)),
+                ('external_url', models.URLField(blank=True, max_length=512)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.page')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('page', 'kind', 'item_id'), name='search_document_unique_item')],
+            },
+            bases=(wagtail.search.index.Indexed, models.Model),
+        ),
+    ]
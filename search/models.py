@@ -0,0 +1,120 @@
+# search/models.py
+from __future__ import annotations
+
+from django.db import models
+from wagtail.search import index
+from wagtail.search.queryset import SearchableQuerySetMixin
+
+from .text import segment
+
+
+class SearchDocumentQuerySet(SearchableQuerySetMixin, models.QuerySet):
+    pass
+
+
+class SearchDocument(index.Indexed, models.Model):
+    """
+    One precomputed search hit: either a whole page or a single item row
+    (written article, video, audio) inside a journalism page.
+
+    Rows are rebuilt per page on publish (see search.documents), so the
+    search view runs one indexed query over this table instead of loading
+    page content.
+    """
+
+    KIND_PAGE = "page"
+    KIND_ARTICLE = "article"
+    KIND_VIDEO = "video"
+    KIND_AUDIO = "audio"
+    KIND_CHOICES = (
+        (KIND_PAGE, "Page"),
+        (KIND_ARTICLE, "Article"),
+        (KIND_VIDEO, "Video"),
+        (KIND_AUDIO, "Audio"),
+    )
+
+    page = models.ForeignKey(
+        "wagtailcore.Page",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=KIND_PAGE)
+    # Same locale as the page; search filters on it inside the index query
+    locale = models.ForeignKey(
+        "wagtailcore.Locale",
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    # pk of the orderable row for item documents; null for the page itself
+    item_id = models.PositiveBigIntegerField(null=True, blank=True)
+
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    date = models.DateField(null=True, blank=True)
+
+    # Page URL including the #anchor of the item on that page
+    url = models.CharField(max_length=512)
+    external_url = models.URLField(max_length=512, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SearchDocumentQuerySet.as_manager()
+
+    # Indexed through the segmented_* properties so each document is
+    # tokenised for its own language (see search.text.segment).
+    search_fields = [
+        index.SearchField("segmented_title", boost=3),
+        index.SearchField("segmented_subtitle", boost=2),
+        index.SearchField("segmented_body"),
+        index.FilterField("kind"),
+        index.FilterField("page_id"),
+        index.FilterField("locale_id"),
+    ]
+    # Indexed in bulk by search.documents when a page is published
+    search_auto_update = False
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["page", "kind", "item_id"],
+                name="search_document_unique_item",
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def language_code(self) -> str:
+        return self.locale.language_code if self.locale_id else ""
+
+    @property
+    def segmented_title(self) -> str:
+        return segment(self.title, self.language_code)
+
+    @property
+    def segmented_subtitle(self) -> str:
+        return segment(self.subtitle, self.language_code)
+
+    @property
+    def segmented_body(self) -> str:
+        return segment(self.body, self.language_code)
+
+    @property
+    def href(self) -> str:
+        """Where a result links to: the original publication when there is one."""
+        return self.external_url or self.url
+
+
+class SearchGeneration(models.Model):
+    """
+    A single row counting changes to the search documents; cached result
+    sets and autocomplete indexes are keyed by it (see search.results).
+    """
+
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return str(self.value)
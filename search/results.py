@@ -0,0 +1,176 @@
+# search/results.py
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from wagtail.models import Locale
+
+from core.cache import cache_is_shared, get_or_set_stale
+
+from .models import SearchDocument, SearchGeneration
+from .text import active_language, is_unsegmented, normalise, segment
+
+
+def normalise_query(query: str | None) -> str:
+    """Collapse whitespace and casefold so equivalent queries share a cache entry."""
+    return " ".join(normalise(query).split()).casefold()
+
+
+GENERATION_KEY = "search:generation"
+# Bounds how long a generation cached in a race with a bump can linger
+GENERATION_TTL = 60
+
+
+def _stored_generation() -> int:
+    return (
+        SearchGeneration.objects.filter(pk=1).values_list("value", flat=True).first()
+        or 0
+    )
+
+
+def get_generation() -> int:
+    """
+    Version of the search documents that every process agrees on. Cached
+    result sets and autocomplete indexes are keyed by it. It is one key in
+    a shared cache, and otherwise a primary-key lookup of its one-row table.
+    """
+    if not cache_is_shared():
+        return _stored_generation()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = _stored_generation()
+        cache.add(GENERATION_KEY, generation, GENERATION_TTL)
+    return generation
+
+
+def bump_generation() -> None:
+    """Invalidate every cached result set (called after documents change)."""
+    if not SearchGeneration.objects.filter(pk=1).update(value=F("value") + 1):
+        SearchGeneration.objects.get_or_create(pk=1, defaults={"value": 2})
+    if cache_is_shared():
+        cache.set(GENERATION_KEY, _stored_generation(), GENERATION_TTL)
+
+
+def get_locale_id(language: str) -> int:
+    """Locale pk for a content language (0 if that locale does not exist)."""
+    key = f"search:locale:{language}"
+    locale_id = cache.get(key)
+    if locale_id is None:
+        locale_id = (
+            Locale.objects.filter(language_code=language)
+            .values_list("pk", flat=True)
+            .first()
+        ) or 0
+        cache.set(key, locale_id, 60 * 10)
+    return locale_id
+
+
+def _max_results() -> int:
+    return getattr(settings, "SEARCH_MAX_RESULTS", 500)
+
+
+def _cache_key(query: str, language: str) -> str:
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return f"search:results:{get_generation()}:{language}:{digest}"
+
+
+def get_result_ids(query: str) -> list[int]:
+    """
+    Ordered SearchDocument ids for a normalised query in the active locale,
+    computed once per query/locale/generation and then served from the cache.
+    At most SEARCH_MAX_RESULTS + 1 ids: the extra one tells ``paginate()``
+    that results were cut off.
+
+    The locale filter is part of the index query itself, so other languages
+    never reach ranking. The backend's relevance order is captured once, so
+    every page of one query is sliced from the same ordering.
+    """
+    language = active_language()
+
+    def run_search():
+        limit = _max_results() + 1
+        results = (
+            SearchDocument.objects.filter(locale_id=get_locale_id(language))
+            .only("pk")
+            .search(
+                segment(query, language),
+                # Bigrams of one phrase should all match, not any of them
+                operator="and" if is_unsegmented(language) else None,
+            )[:limit]
+        )
+        return [doc.pk for doc in results]
+
+    # Results only change with the generation (part of the key), so a stale
+    # entry is still correct: refresh it in one request, serve it to the rest.
+    return get_or_set_stale(
+        _cache_key(query, language),
+        run_search,
+        soft_ttl=getattr(settings, "SEARCH_RESULTS_CACHE_TTL", 300),
+    )
+
+
+@dataclass
+class ResultsPage:
+    """
+    One page of cached results. Mirrors the bits of Django's ``Page`` the
+    template uses, without a COUNT query or re-running the search.
+    """
+
+    object_list: list = field(default_factory=list)
+    number: int = 1
+    has_next_page: bool = False
+    # More than SEARCH_MAX_RESULTS matched: only the first ones are listed
+    truncated: bool = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.has_next_page
+
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+
+def _page_number(value) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def paginate(ids: list[int], page, per_page: int = 10) -> ResultsPage:
+    """Slice the cached id list; only the visible rows are loaded."""
+    truncated = len(ids) > _max_results()
+    ids = ids[: _max_results()]
+    number = _page_number(page)
+    # Past the end: show the last page (like the previous EmptyPage handling)
+    last = max((len(ids) - 1) // per_page + 1, 1)
+    number = min(number, last)
+
+    start = (number - 1) * per_page
+    window = ids[start : start + per_page]
+    rows = SearchDocument.objects.in_bulk(window)
+
+    return ResultsPage(
+        object_list=[rows[pk] for pk in window if pk in rows],
+        number=number,
+        has_next_page=len(ids) > start + per_page,
+        truncated=truncated,
+    )
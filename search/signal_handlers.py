@@ -0,0 +1,71 @@
+# search/signal_handlers.py
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_delete
+from wagtail.search import index
+from wagtail.models import Page
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from .documents import remove_page_documents
+from .results import bump_generation
+from .tasks import update_page_index_task
+
+
+def _indexed_on_publish(instance) -> bool:
+    """
+    Pages that opt out of Wagtail's save-time indexing
+    (``search_auto_update = False``) are indexed here instead.
+    """
+    return not getattr(instance, "search_auto_update", True)
+
+
+def page_published_signal_handler(instance, **kwargs):
+    # Enqueued on transaction commit by the TASKS backend. Every page gets a
+    # SearchDocument; the task also handles pages still indexed on save.
+    update_page_index_task.enqueue(instance.pk)
+
+
+def page_unpublished_signal_handler(instance, **kwargs):
+    update_page_index_task.enqueue(instance.pk)
+
+
+def page_url_changed_signal_handler(instance, **kwargs):
+    """Slug change or move: the page and every descendant has a new URL."""
+    for page_id in Page.objects.descendant_of(instance, inclusive=True).values_list(
+        "pk", flat=True
+    ):
+        update_page_index_task.enqueue(page_id)
+
+
+def pre_delete_signal_handler(instance, **kwargs):
+    # Index entries are not cascaded with the SearchDocument rows
+    if isinstance(instance, Page):
+        remove_page_documents(instance.pk)
+        # Once committed, or a search could cache the old documents under
+        # the new generation
+        transaction.on_commit(bump_generation)
+
+
+def post_delete_signal_handler(instance, **kwargs):
+    # The row is gone, so a background task could not load it: remove inline
+    # (same as Wagtail's own delete handler).
+    if _indexed_on_publish(instance):
+        index.remove_object(instance)
+
+
+def register_signal_handlers():
+    page_published.connect(page_published_signal_handler)
+    page_unpublished.connect(page_unpublished_signal_handler)
+    page_slug_changed.connect(page_url_changed_signal_handler)
+    post_page_move.connect(page_url_changed_signal_handler)
+    pre_delete.connect(pre_delete_signal_handler)
+
+    for model in index.get_indexed_models():
+        if not getattr(model, "search_auto_update", True):
+            post_delete.connect(post_delete_signal_handler, sender=model)
@@ -0,0 +1,39 @@
+# search/tasks.py
+from __future__ import annotations
+
+from django_tasks import task
+from wagtail.models import Page
+from wagtail.search import index
+
+from .documents import remove_page_documents, sync_page_documents
+from .results import bump_generation
+
+
+@task()
+def update_page_index_task(page_id: int) -> None:
+    """
+    (Re)index one page after publish, or drop it from the index once it is
+    no longer live. Runs on the TASKS backend, so editor saves never wait on it.
+
+    Also refreshes the page's SearchDocument rows; if its URL changed,
+    descendants are queued too since their URLs moved with it.
+    """
+    page = Page.objects.filter(pk=page_id).specific().first()
+    if page is None:
+        remove_page_documents(page_id)
+        bump_generation()
+        return
+
+    if page.live:
+        index.insert_or_update_object(page)
+    else:
+        index.remove_object(page)
+
+    url_changed = sync_page_documents(page)
+    # Cached result sets and autocomplete indexes are keyed by generation:
+    # drop them all at once, in every process
+    bump_generation()
+
+    if url_changed:
+        for descendant_id in page.get_descendants().values_list("pk", flat=True):
+            update_page_index_task.enqueue(descendant_id)
@@ -0,0 +1,260 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Locale
+from wagtail.search.backends import get_search_backend
+
+from core.testing import build_site, publish
+
+from .autocomplete import AutocompleteCache, PrefixIndex, Suggestion
+from .documents import build_documents
+from .models import SearchDocument
+from .results import paginate
+from .text import segment
+
+
+class IndexingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def documents(self, page):
+        return SearchDocument.objects.filter(page_id=page.pk)
+
+    def test_published_page_is_indexed_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish(self.site.bts)
+        # Queued on commit, not run inside the editor's transaction
+        self.assertFalse(self.documents(self.site.bts).exists())
+
+        for callback in callbacks:
+            callback()
+        document = self.documents(self.site.bts).get()
+        self.assertEqual(document.kind, SearchDocument.KIND_PAGE)
+        self.assertEqual(document.url, self.site.bts.url)
+        self.assertEqual(document.locale_id, self.site.bts.locale_id)
+
+    def test_unpublished_page_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        self.assertTrue(self.documents(self.site.bts).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.unpublish()
+        self.assertFalse(self.documents(self.site.bts).exists())
+
+    def test_deleted_page_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        page_id = self.site.bts.pk
+        self.assertTrue(self.documents(self.site.bts).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.bts.delete()
+        self.assertFalse(SearchDocument.objects.filter(page_id=page_id).exists())
+
+    def test_private_page_is_not_indexed(self):
+        self.site.bts.view_restrictions.create(
+            restriction_type="password", password="secret"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.bts)
+        self.assertFalse(self.documents(self.site.bts).exists())
+
+
+class DocumentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+
+    def test_items_get_their_own_documents(self):
+        written = self.site.written
+        article = written.articles.create(
+            title="Harbour story",
+            publication_name="The Paper",
+            external_url="https://example.com/harbour",
+            excerpt="<p>About the <b>harbour</b>.</p>",
+        )
+        page, item = build_documents(written)
+
+        self.assertEqual(page.kind, SearchDocument.KIND_PAGE)
+        self.assertEqual(item.kind, SearchDocument.KIND_ARTICLE)
+        self.assertEqual(item.item_id, article.pk)
+        self.assertEqual(item.title, "Harbour story")
+        self.assertEqual(item.subtitle, "The Paper")
+        self.assertEqual(item.body, "About the harbour.")
+        self.assertEqual(item.url, f"{written.url}#article-{article.pk}")
+        self.assertEqual(item.href, "https://example.com/harbour")
+
+    def test_item_rich_text_is_flattened(self):
+        video = self.site.video
+        video.videos.create(
+            standfirst="Night shoot",
+            description="<p>Filmed <i>at night</i>.</p>",
+            produced_by="Crew",
+            embed_url="https://www.youtube.com/watch?v=x",
+        )
+        item = build_documents(video)[1]
+        self.assertEqual(item.kind, SearchDocument.KIND_VIDEO)
+        self.assertEqual(item.body, "Filmed at night. Crew")
+
+
+@override_settings(SEARCH_MAX_RESULTS=25)
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        site = build_site()
+        cls.ids = [
+            SearchDocument.objects.create(
+                page=site.home, title=f"Result {number}", url=f"/#{number}"
+            ).pk
+            for number in range(25)
+        ]
+        cls.locale_id = site.home.locale_id
+
+    def test_pages_without_counting(self):
+        with self.assertNumQueries(1):
+            results = paginate(self.ids, 2, per_page=10)
+        self.assertEqual([doc.pk for doc in results], self.ids[10:20])
+        self.assertTrue(results.has_previous())
+        self.assertTrue(results.has_next())
+        self.assertFalse(results.truncated)
+
+    def test_past_the_end_shows_the_last_page(self):
+        results = paginate(self.ids, 99, per_page=10)
+        self.assertEqual(results.number, 3)
+        self.assertEqual([doc.pk for doc in results], self.ids[20:])
+        self.assertFalse(results.has_next())
+
+    def test_invalid_page_shows_the_first(self):
+        self.assertEqual(paginate(self.ids, "x", per_page=10).number, 1)
+
+    def test_truncation_is_exposed(self):
+        # The result cache holds one id more than it lists when cut off
+        results = paginate(self.ids + [self.ids[0]], 3, per_page=10)
+        self.assertTrue(results.truncated)
+        self.assertEqual(len(results), 5)
+        self.assertFalse(results.has_next())
+
+    @override_settings(SHARED_CACHE=True)
+    def test_cached_pages_do_not_count(self):
+        documents = SearchDocument.objects.filter(pk__in=self.ids)
+        documents.update(body="harbour", locale_id=self.locale_id)
+        get_search_backend().add_bulk(SearchDocument, list(documents))
+        cache.clear()
+        self.client.get("/search/", {"query": "harbour"})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/search/", {"query": "harbour", "page": 2})
+        self.assertEqual(len(response.context["search_results"]), 10)
+        documents = [q["sql"] for q in queries if "search_searchdocument" in q["sql"]]
+        # Only the visible rows: no COUNT, no search, no generation aggregate
+        self.assertEqual(len(documents), 1)
+        self.assertNotIn("COUNT(", " ".join(q["sql"] for q in queries))
+
+    def test_refine_search_note(self):
+        documents = SearchDocument.objects.filter(pk__in=self.ids)
+        documents.update(body="harbour", locale_id=self.locale_id)
+        get_search_backend().add_bulk(SearchDocument, list(documents))
+        with override_settings(SEARCH_MAX_RESULTS=5):
+            response = self.client.get("/search/", {"query": "harbour"})
+        self.assertEqual(len(response.context["search_results"]), 5)
+        self.assertContains(response, "Refine your search")
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_site()
+        with cls.captureOnCommitCallbacks(execute=True):
+            publish(cls.site.bts)
+            publish(cls.site.written)
+
+    def setUp(self):
+        cache.clear()
+        self.cache = AutocompleteCache()
+
+    def titles(self, query):
+        return [suggestion.title for suggestion in self.cache.suggest(query)]
+
+    def test_prefix_of_any_word(self):
+        self.assertIn("Making of", self.titles("mak"))
+        self.assertIn("Making of", self.titles("of"))
+        self.assertEqual(self.titles("m"), [])
+
+    def test_typo_falls_back_to_trigrams(self):
+        self.assertIn("Written", self.titles("writen"))
+
+    def test_publish_in_another_process_is_seen(self):
+        self.assertEqual(self.titles("harb"), [])
+        # As another worker would: only the database changes
+        self.site.written.articles.create(
+            title="Harbour story",
+            publication_name="The Paper",
+            external_url="https://example.com/harbour",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(self.site.written)
+        self.assertEqual(self.titles("harb"), ["Harbour story"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.written.unpublish()
+        self.assertEqual(self.titles("harb"), [])
+
+    def test_keystrokes_read_the_generation_only(self):
+        self.titles("mak")
+        # Its one-row table, by primary key
+        with self.assertNumQueries(1):
+            self.titles("mak")
+        with override_settings(SHARED_CACHE=True):
+            self.titles("mak")
+            with self.assertNumQueries(0):
+                self.titles("mak")
+
+    def test_endpoint(self):
+        response = self.client.get("/search/autocomplete/", {"q": "writ"})
+        self.assertEqual(
+            response.json()["results"][0],
+            {"title": "Written", "url": self.site.written.url, "kind": "page"},
+        )
+
+
+class LocaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        site = build_site()
+        japanese = Locale.objects.create(language_code="ja")
+        documents = [
+            SearchDocument.objects.create(
+                page=site.home, locale=locale, title=title, url=url
+            )
+            for locale, title, url in [
+                (japanese, "東京タワーの夜", "/ja/#tower"),
+                (site.home.locale, "Tokyo tower at night", "/#tower"),
+            ]
+        ]
+        get_search_backend().add_bulk(SearchDocument, documents)
+
+    def test_japanese_is_segmented_into_bigrams(self):
+        self.assertEqual(segment("東京タワー", "ja"), "東京 京タ タワ ワー")
+        self.assertEqual(segment("東京タワー", "en"), "東京タワー")
+        # Full-width Latin is folded either way
+        self.assertEqual(segment("ＴＯＷＥＲ", "ja"), "TOWER")
+
+    def test_search_stays_in_the_active_locale(self):
+        response = self.client.get("/ja/search/", {"query": "タワー"})
+        self.assertEqual(
+            [doc.title for doc in response.context["search_results"]],
+            ["東京タワーの夜"],
+        )
+        response = self.client.get("/search/", {"query": "tower"})
+        self.assertEqual(
+            [doc.title for doc in response.context["search_results"]],
+            ["Tokyo tower at night"],
+        )
+
+    def test_autocomplete_matches_inside_japanese_titles(self):
+        index = PrefixIndex([Suggestion("東京タワー tower", "/", "page")])
+        self.assertEqual(len(index.lookup("タワー", 8)), 1)
+        # Only the CJK run is indexed from every character, not the Latin
+        # text after it
+        self.assertEqual(index.lookup("wer", 8), [])
+        self.assertEqual(len(index.lookup("tow", 8)), 1)
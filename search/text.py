@@ -0,0 +1,58 @@
+# search/text.py
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.utils import translation
+from wagtail.coreutils import get_supported_content_language_variant
+
+# Hiragana, Katakana, CJK Extension A, CJK Unified, CJK Compatibility
+CJK_RUN = re.compile(
+    "[\u3040-\u309f\u30a0-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+"
+)
+
+# Languages written without spaces between words
+UNSEGMENTED_LANGUAGES = {"ja", "zh", "ko"}
+
+
+def active_language() -> str:
+    """Content language for the current request (e.g. "da" for "da-dk")."""
+    try:
+        return get_supported_content_language_variant(
+            translation.get_language() or settings.LANGUAGE_CODE
+        )
+    except LookupError:
+        return settings.LANGUAGE_CODE
+
+
+def normalise(text: str) -> str:
+    """NFKC: folds full-width Latin and half-width kana onto their usual forms."""
+    return unicodedata.normalize("NFKC", text or "")
+
+
+def _bigrams(run: str) -> str:
+    if len(run) < 2:
+        return run
+    return " ".join(run[i : i + 2] for i in range(len(run) - 1))
+
+
+def segment(text: str, language: str) -> str:
+    """
+    Make text tokenisable by the search backend for ``language``.
+
+    Text is NFKC-normalised first. For Japanese, runs of CJK characters
+    become overlapping bigrams: the backend's word tokenisers treat a whole
+    unspaced sentence as one token, bigrams let any two-character substring
+    match. Other languages pass
+    through unchanged.
+    """
+    text = normalise(text)
+    if language.split("-")[0] not in UNSEGMENTED_LANGUAGES:
+        return text
+    return CJK_RUN.sub(lambda match: f" {_bigrams(match.group())} ", text).strip()
+
+
+def is_unsegmented(language: str) -> bool:
+    return language.split("-")[0] in UNSEGMENTED_LANGUAGES
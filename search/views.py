@@ -1,6 +1,10 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.conf import settings
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
-from wagtail.models import Page
+from django.views.decorators.http import require_GET
+
+from .autocomplete import autocomplete_cache
+from .results import ResultsPage, get_result_ids, normalise_query, paginate
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -14,9 +18,16 @@ def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
-    # Search
-    if search_query:
-        search_results = Page.objects.live().search(search_query)
+    # Search: ranked ids come from the result cache (one backend query per
+    # normalised query/locale until the next publish), so paging never
+    # re-runs the search or counts.
+    normalised_query = normalise_query(search_query)
+    if normalised_query:
+        search_results = paginate(
+            get_result_ids(normalised_query),
+            page,
+            per_page=getattr(settings, "SEARCH_RESULTS_PER_PAGE", 10),
+        )
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -24,16 +35,7 @@ def search(request):
         # query.add_hit()
 
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        search_results = ResultsPage()
 
     return TemplateResponse(
         request,
@@ -43,3 +45,18 @@ def search(request):
             "search_results": search_results,
         },
     )
+
+
+@require_GET
+def autocomplete(request):
+    """
+    JSON suggestions for search-as-you-type, served from the in-process
+    prefix index (no search backend query per keystroke).
+    """
+    suggestions = autocomplete_cache.suggest(request.GET.get("q", ""))
+
+    response = JsonResponse(
+        {"results": [suggestion.as_dict() for suggestion in suggestions]}
+    )
+    response["Cache-Control"] = "public, max-age=60"
+    return response
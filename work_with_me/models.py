@@ -10,7 +10,9 @@ from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.contrib.forms.models import AbstractEmailForm, AbstractFormField
 from wagtail.fields import RichTextField
-from wagtail.models import Page, Site
+from wagtail.models import Page
+
+from core.sites import default_site
 
 from .forms import ContactForm
 
@@ -148,19 +150,16 @@ class WorkWithMePage(AbstractEmailForm):
         if path_or_url.startswith(("http://", "https://")):
             return path_or_url
 
-        try:
-            site = Site.objects.filter(is_default_site=True).first()
-            if not site:
-                return path_or_url
-
-            host = site.hostname
-            port = site.port
-            scheme = "https"
-            port_part = "" if port in (80, 443, None) else f":{port}"
-            return f"{scheme}://{host}{port_part}{path_or_url}"
-        except Exception:
+        site = default_site()
+        if not site:
             return path_or_url
 
+        host = site.hostname
+        port = site.port
+        scheme = "https"
+        port_part = "" if port in (80, 443, None) else f":{port}"
+        return f"{scheme}://{host}{port_part}{path_or_url}"
+
     def get_qr_payload(self) -> str:
         """Default QR target: our inline vCard endpoint (a URL)."""
         try:
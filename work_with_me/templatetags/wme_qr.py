@@ -4,6 +4,8 @@ from django import template
 from django.utils.html import format_html
 from django.utils.safestring import SafeString, mark_safe
 
+from core import metrics
+
 try:
     import segno
 except ImportError:
@@ -33,6 +35,7 @@ def wme_qr_svg(data, scale=10, border=None, title=None):
         return ""
 
     qr = segno.make(data, error="h")
+    metrics.inc("generated_total", kind="qr")
 
     border_int = 4 if border is None else _to_int(border, 4)
     scale_int = _to_int(scale, 10)
@@ -62,6 +65,7 @@ def wme_qr_png(data, scale=8, border=8, title="Scan QR"):
         return ""
 
     qr = segno.make(data, error="h")
+    metrics.inc("generated_total", kind="qr")
 
     scale_int = _to_int(scale, 8)
     border_int = _to_int(border, 8)
@@ -4,6 +4,8 @@ from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.text import slugify
 
+from core import metrics
+
 from .models import WorkWithMePage
 
 
@@ -82,6 +84,7 @@ def vcard_inline(request, page_id: int) -> HttpResponse:
     if not content_str:
         raise Http404("No vCard available")
 
+    metrics.inc("generated_total", kind="vcard")
     response = HttpResponse(content_str, content_type="text/vcard; charset=utf-8")
 
     # Inline by default; allow forced download with ?download=1|true|yes